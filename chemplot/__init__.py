@@ -1,2 +1,3 @@
 from .chemplot import Plotter
+from .molecules import MoleculeSet
 from .utils import info_data, load_data
@@ -0,0 +1,76 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# On-disk cache of per-molecule descriptors and fingerprints
+#
+# License: BSD 3 clause
+import contextlib
+import hashlib
+import os
+import sqlite3
+
+# SQLite limits the number of variables bound in a single query
+_BATCH_SIZE = 900
+
+
+class MoleculeCache(object):
+    """
+    A class used to store per-molecule rows (descriptors or fingerprints) on
+    disk, keyed by canonical SMILES. Each configuration (kind of representation
+    and its parameters) is stored in its own SQLite file inside cache_dir, so
+    that rows computed with different settings are never mixed.
+
+    :param cache_dir: directory where the cache files are stored. It is created if missing.
+    :param kind: name of the representation stored (e.g. "ecfp" or "mordred")
+    :param config: description of the parameters used to compute the rows
+    :param path: path of the SQLite file holding the rows of this configuration
+    :type cache_dir: string
+    :type kind: string
+    :type config: string
+    :type path: string
+    """
+
+    def __init__(self, cache_dir, kind, config):
+        os.makedirs(cache_dir, exist_ok=True)
+        config_hash = hashlib.sha1(config.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"{kind}_{config_hash}.sqlite")
+        with self.__connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+    def get(self, keys):
+        """
+        Looks up the rows stored for the given keys.
+
+        :param keys: Canonical SMILES to look up
+        :type keys: list
+        :returns: The stored rows of the keys found in the cache
+        :rtype: dict
+        """
+        keys = list(set(keys))
+        rows = {}
+        with self.__connect() as connection:
+            for start in range(0, len(keys), _BATCH_SIZE):
+                batch = keys[start : start + _BATCH_SIZE]
+                query = "SELECT key, value FROM rows WHERE key IN ({})".format(",".join("?" * len(batch)))
+                rows.update(connection.execute(query, batch))
+        return rows
+
+    def put(self, rows):
+        """
+        Appends rows to the cache, replacing the rows already stored for the same keys.
+
+        :param rows: Mapping from canonical SMILES to the bytes of the row
+        :type rows: dict
+        """
+        if len(rows) == 0:
+            return
+        with self.__connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO rows (key, value) VALUES (?, ?)", rows.items())
+
+    @contextlib.contextmanager
+    def __connect(self):
+        # Commit on success and always close the connection
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
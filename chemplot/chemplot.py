@@ -3,31 +3,47 @@
 # License: BSD 3 clause
 from __future__ import print_function
 
-import base64
 import functools
-from io import BytesIO
+import itertools
+import os
+import time
+import warnings
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import umap
-from bokeh.io import output_file, save, show
-from bokeh.models import ColorBar, HoverTool, TabPanel, Tabs
-from bokeh.models.mappers import LinearColorMapper
-from bokeh.palettes import Category10, Inferno
-from bokeh.plotting import figure
-from bokeh.transform import factor_cmap, transform
 from pandas.api.types import is_numeric_dtype
-from rdkit.Chem import Draw
-from scipy import stats
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
+from scipy.sparse import issparse
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
 from sklearn.preprocessing import StandardScaler
+from sklearn.utils import gen_batches
 
 import chemplot.descriptors as desc
 import chemplot.parameters as parameters
+from chemplot.molecules import MoleculeSet
+from chemplot.utils import map_chunks
+
+# UMAP warns that transform is not available when the precomputed neighbours come without a search index
+_UMAP_NO_INDEX_WARNING = r"precomputed_knn\[2\]"
+
+
+def _layout_chunk(layouts, method, random_state):
+    # Fit a t-SNE or UMAP model for each (parameters, input) pair of the chunk, returning the components and the seconds spent
+    results = []
+    for kwargs, data in layouts:
+        start = time.perf_counter()
+        if method == "tsne":
+            from sklearn.manifold import TSNE
+
+            model = TSNE(n_components=2, random_state=random_state, **kwargs)
+        else:
+            import umap
+
+            model = umap.UMAP(n_components=2, random_state=random_state, **kwargs)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=_UMAP_NO_INDEX_WARNING)
+            components = model.fit_transform(data)
+        results.append((components, time.perf_counter() - start))
+    return results
 
 
 def calltracker(func):
@@ -53,6 +69,20 @@ class Plotter(object):
     :param __df_2_components: dataframe containing the two-dimenstional representation of each molecule
     :param __plot_title: title of the plot reflecting the dimensionality reduction algorithm used
     :param __data: list of the scaled descriptors to which the dimensionality reduction algorithm is applied
+    :param __sparse: indicates if the structural fingerprints are kept as a sparse matrix
+    :param __scaled_data: scaled descriptors matrix shared by pca, tsne and umap
+    :param __scaled_descriptors: descriptors from which __scaled_data was computed, used to detect when they change
+    :param __reduced_data: PCA (truncated SVD if sparse) preprocessing of __scaled_data and its explained variance, by number of components and random state
+    :param __scaler: scaler fitted on the descriptors, None if they are not scaled
+    :param __embedding: name of the embedding computed last (pca, tsne or umap)
+    :param __preprocessing: fitted steps (scaler, PCA preprocessing) applied to the descriptors before the embedding computed last
+    :param __neighbors_graph: neighbours graph used by the embedding computed last, None if not used
+    :param __neighbors_graphs: neighbours graphs built for the scaled or reduced data, shared by t-SNE and UMAP
+    :param __landmark_rows: rows of the molecules embedded by the embedding computed last, None if all the molecules are embedded
+    :param __landmarks: landmark rows picked for the scaled or reduced data
+    :param __unique_rows: rows of the first molecule of each structure, None if all the rows are embedded
+    :param __unique_inverse: index of the structure of each row in __unique_rows, None if all the rows are embedded
+    :param __smiles: canonical SMILES of the molecules, computed when first needed by the interactive plots
     :param pca_fit: PCA object created when the corresponding algorithm is applied to the data
     :param tsne_fit: t-SNE object created when the corresponding algorithm is applied to the data
     :param umap_fit: UMAP object created when the corresponding algorithm is applied to the data
@@ -65,21 +95,57 @@ class Plotter(object):
     :type __df_2_components: Dataframe
     :type __plot_title: string
     :type __data: list
+    :type __sparse: boolean
+    :type __scaled_data: numpy.ndarray
+    :type __scaled_descriptors: Dataframe
+    :type __reduced_data: dict
+    :type __scaler: sklearn.preprocessing.StandardScaler
+    :type __embedding: string
+    :type __preprocessing: list
+    :type __neighbors_graph: chemplot.neighbors.NeighborsGraph
+    :type __neighbors_graphs: dict
+    :type __landmark_rows: numpy.ndarray
+    :type __landmarks: dict
+    :type __unique_rows: numpy.ndarray
+    :type __unique_inverse: numpy.ndarray
+    :type __smiles: list
     :type pca_fit: sklearn.decomposition.TSNE
     :type tsne_fit: sklearn.manifold.TSNE
     :type umap_fit: umap.umap_.UMAP
     :type df_plot_xy: Dataframe
     """
 
-    _static_plots = {"scatter", "hex", "kde"}
+    _static_plots = {"scatter", "hex", "kde", "raster"}
 
     _interactive_plots = {"scatter", "hex"}
+    _interactive_images = {"embedded", "browser"}
+    _output_backends = {"canvas", "webgl", "svg"}
+
+    _pca_solvers = {None, "randomized", "incremental"}
+    _cluster_algorithms = {"kmeans", "minibatch", "hdbscan", "butina"}
+    _cluster_spaces = {"embedding", "descriptors"}
+    _cluster_scores = {"silhouette", "calinski_harabasz"}
 
     _sim_types = {"tailored", "structural"}
 
     _target_types = {"R", "C"}
 
-    def __init__(self, encoding_list, target, target_type, sim_type, get_desc, get_fingerprints):
+    def __init__(
+        self,
+        encoding_list,
+        target,
+        target_type,
+        sim_type,
+        get_desc,
+        get_fingerprints,
+        n_jobs=1,
+        sparse=False,
+        chunk_size=None,
+        timeout=None,
+        cache_dir=None,
+        dedupe=False,
+        embed_unique=False,
+    ):
         # Error handeling sym_type
         if sim_type not in self._sim_types:
             if len(target) > 0:
@@ -141,45 +207,129 @@ class Plotter(object):
                 print("Only one class found in the targets")
 
         # Instantiate Plotter class
+        self.__sparse = sparse and self.__sim_type == "structural"
+        dedupe = dedupe or embed_unique
         if self.__sim_type == "tailored":
-            self.__mols, df_descriptors, target = get_desc(encoding_list, target)
+            self.__mols, df_descriptors, target = get_desc(
+                encoding_list, target, n_jobs=n_jobs, chunk_size=chunk_size, timeout=timeout, cache_dir=cache_dir, dedupe=dedupe
+            )
             if df_descriptors.empty:
                 raise Exception("Descriptors could not be computed for given molecules")
             self.__df_descriptors, self.__target = desc.select_descriptors_lasso(df_descriptors, target, kind=self.__target_type)
         elif self.__sim_type == "structural":
-            self.__mols, self.__df_descriptors, self.__target = get_fingerprints(encoding_list, target, 2, 2048)
+            self.__mols, self.__df_descriptors, self.__target = get_fingerprints(
+                encoding_list, target, 2, 2048, n_jobs=n_jobs, sparse=sparse, chunk_size=chunk_size, cache_dir=cache_dir, dedupe=dedupe
+            )
 
         if len(self.__mols) < 2 or len(self.__df_descriptors.columns) < 2:
             raise Exception("Plotter object cannot be instantiated for given molecules")
 
+        # Rows of the first molecule of each structure, and the index of the structure of each row
+        self.__unique_rows = None
+        self.__unique_inverse = None
+        if embed_unique:
+            # The molecules kept are the ones of the MoleculeSet, so they are matched to their canonical SMILES by identity
+            canonical_smiles = {id(mol): key for mol, key in zip(encoding_list.mols, encoding_list.canonical_smiles)}
+            keys = [canonical_smiles[id(mol)] for mol in self.__mols]
+            _, self.__unique_rows, self.__unique_inverse = np.unique(keys, return_index=True, return_inverse=True)
+
         self.__df_2_components = None
         self.__plot_title = None
+        self.__scaled_descriptors = None
+        self.__data = None
+        self.__scaled_data = None
+        self.__scaler = None
+        self.__reduced_data = {}
+        self.__embedding = None
+        self.__preprocessing = []
+        self.__neighbors_graph = None
+        self.__neighbors_graphs = {}
+        self.__landmark_rows = None
+        self.__landmarks = {}
+        self.__smiles = None
 
     @classmethod
-    def from_smiles(cls, smiles_list, target=[], target_type=None, sim_type=None):
+    def from_smiles(
+        cls,
+        smiles_list,
+        target=[],
+        target_type=None,
+        sim_type=None,
+        n_jobs=1,
+        sparse=False,
+        chunk_size=None,
+        timeout=None,
+        cache_dir=None,
+        dedupe=False,
+        embed_unique=False,
+    ):
         """
         Class method to construct a Plotter object from a list of SMILES.
 
-        :param smile_list: List of the SMILES representation of the molecules to plot.
+        :param smile_list: List of the SMILES representation of the molecules to plot, or a MoleculeSet parsed from them.
         :param target: target values
         :param target_type: target type R (regression) or C (classificatino)
         :param sim_type: similarity type structural or tailored
+        :param n_jobs: number of worker processes used to compute the descriptors or fingerprints. -1 uses all the available CPUs.
+        :param sparse: keep the structural fingerprints as a sparse matrix, which is never densified by pca, tsne or umap
+        :param chunk_size: number of molecules sent to a worker process at once
+        :param timeout: seconds after which the descriptors calculation of a molecule is abandoned and the molecule removed.
+            A calculation stuck in a single call to native code (RDKit, numpy) is not interrupted.
+        :param cache_dir: directory of an on-disk cache of descriptors and fingerprints, so that only new molecules are computed
+        :param dedupe: compute the descriptors or fingerprints of identical molecules (same canonical SMILES) only once
+        :param embed_unique: also fit pca, tsne and umap on a single point per molecule, duplicates get the coordinates of their molecule
         :type smile_list: list
         :type target: list
         :type target_type: string
         :type sim_type: string
+        :type n_jobs: int
+        :type sparse: boolean
+        :type chunk_size: int
+        :type timeout: float
+        :type cache_dir: string
+        :type dedupe: boolean
+        :type embed_unique: boolean
         :returns: A Plotter object for the molecules given as input.
         :rtype: Plotter
         """
-
-        return cls(smiles_list, target, target_type, sim_type, desc.get_mordred_descriptors, desc.get_ecfp)
+        if embed_unique and not isinstance(smiles_list, MoleculeSet):
+            smiles_list = MoleculeSet.from_smiles(smiles_list, n_jobs=n_jobs, chunk_size=chunk_size)
+
+        return cls(
+            smiles_list,
+            target,
+            target_type,
+            sim_type,
+            desc.get_mordred_descriptors,
+            desc.get_ecfp,
+            n_jobs=n_jobs,
+            sparse=sparse,
+            chunk_size=chunk_size,
+            timeout=timeout,
+            cache_dir=cache_dir,
+            dedupe=dedupe,
+            embed_unique=embed_unique,
+        )
 
     @classmethod
-    def from_inchi(cls, inchi_list, target=[], target_type=None, sim_type=None):
+    def from_inchi(
+        cls,
+        inchi_list,
+        target=[],
+        target_type=None,
+        sim_type=None,
+        n_jobs=1,
+        sparse=False,
+        chunk_size=None,
+        timeout=None,
+        cache_dir=None,
+        dedupe=False,
+        embed_unique=False,
+    ):
         """
         Class method to construct a Plotter object from a list of InChi.
 
-        :param inchi_list: List of the InChi representation of the molecules to plot.
+        :param inchi_list: List of the InChi representation of the molecules to plot, or a MoleculeSet parsed from them.
         :type inchi_list: dict
         :param target: target values
         :type target: dict
@@ -187,26 +337,81 @@ class Plotter(object):
         :type target_type: string
         :param sim_type: similarity type structural or tailored
         :type sim_type: string
+        :param n_jobs: number of worker processes used to compute the descriptors or fingerprints. -1 uses all the available CPUs.
+        :type n_jobs: int
+        :param sparse: keep the structural fingerprints as a sparse matrix, which is never densified by pca, tsne or umap
+        :type sparse: boolean
+        :param chunk_size: number of molecules sent to a worker process at once
+        :type chunk_size: int
+        :param timeout: seconds after which the descriptors calculation of a molecule is abandoned and the molecule removed.
+            A calculation stuck in a single call to native code (RDKit, numpy) is not interrupted.
+        :type timeout: float
+        :param cache_dir: directory of an on-disk cache of descriptors and fingerprints, so that only new molecules are computed
+        :param dedupe: compute the descriptors or fingerprints of identical molecules (same canonical SMILES) only once
+        :type dedupe: boolean
+        :param embed_unique: also fit pca, tsne and umap on a single point per molecule, duplicates get the coordinates of their molecule
+        :type embed_unique: boolean
         :returns: A Plotter object for the molecules given as input.
         :rtype: Plotter
         """
-
-        return cls(inchi_list, target, target_type, sim_type, desc.get_mordred_descriptors_from_inchi, desc.get_ecfp_from_inchi)
-
-    def pca(self, **kwargs):
+        if embed_unique and not isinstance(inchi_list, MoleculeSet):
+            inchi_list = MoleculeSet.from_inchi(inchi_list, n_jobs=n_jobs, chunk_size=chunk_size)
+
+        return cls(
+            inchi_list,
+            target,
+            target_type,
+            sim_type,
+            desc.get_mordred_descriptors_from_inchi,
+            desc.get_ecfp_from_inchi,
+            n_jobs=n_jobs,
+            sparse=sparse,
+            chunk_size=chunk_size,
+            timeout=timeout,
+            cache_dir=cache_dir,
+            dedupe=dedupe,
+            embed_unique=embed_unique,
+        )
+
+    def pca(self, solver=None, batch_size=None, **kwargs):
         """
         Calculates the first 2 PCA components of the molecular descriptors.
-
-        :param kwargs: Other keyword arguments are passed down to sklearn.decomposition.PCA
+        Sparse fingerprints are reduced by truncated SVD instead.
+
+        :param solver: None for the default PCA, "randomized" for a randomized SVD or "incremental" to fit an incremental PCA on
+            batches of molecules read from the descriptors matrix (which can be memory-mapped), without computing the whole scaled matrix.
+        :param batch_size: Number of molecules per batch of the incremental PCA. By default 5 times the number of descriptors.
+        :param kwargs: Other keyword arguments are passed down to sklearn.decomposition.PCA (sklearn.decomposition.TruncatedSVD if sparse,
+            sklearn.decomposition.IncrementalPCA if incremental)
+        :type solver: string
+        :type batch_size: int
         :type kwargs: key, value mappings
         :returns: The dataframe containing the PCA components.
         :rtype: Dataframe
         """
-        self.__data = self.__data_scaler()
+        if solver not in self._pca_solvers:
+            print(
+                "solver indicates how the PCA is fitted. Currently supported solvers are:\n"
+                + "-randomized SVD (randomized)\n"
+                + "-incremental PCA on batches of molecules (incremental)\n"
+                + "The default solver has been selected."
+            )
+            solver = None
 
         # Linear dimensionality reduction to 2 components by PCA
-        self.pca_fit = PCA(n_components=2, **kwargs)
-        first2ecpf_components = self.pca_fit.fit_transform(self.__data)
+        self.__neighbors_graph = None
+        self.__landmark_rows = None
+        if solver == "incremental":
+            self.pca_fit = IncrementalPCA(n_components=2, **kwargs)
+            first2ecpf_components, scaler = self.__incremental_fit_transform(self.pca_fit, batch_size)
+            self.__set_preprocessing("pca", scaler)
+        else:
+            self.__data = self.__data_scaler()
+            if solver == "randomized" and not self.__sparse:
+                kwargs = {"svd_solver": "randomized", **kwargs}
+            self.pca_fit = self.__pca_model(2, **kwargs)
+            first2ecpf_components = self.__fit_transform(self.pca_fit)
+            self.__set_preprocessing("pca", self.__scaler)
         coverage_components = self.pca_fit.explained_variance_ratio_
 
         # Create labels for the plot
@@ -222,51 +427,55 @@ class Plotter(object):
 
         return self.__df_2_components.copy()
 
-    def tsne(self, perplexity=None, pca=False, random_state=None, **kwargs):
+    def tsne(self, perplexity=None, pca=False, random_state=None, tanimoto=False, landmarks=None, **kwargs):
         """
         Calculates the first 2 t-SNE components of the molecular descriptors.
 
         :param perplexity: perplexity value for the t-SNE model
         :param pca: indicates if the features must be preprocessed by PCA
         :param random_state: random seed that can be passed as a parameter for reproducing the same results
+        :param tanimoto: if True the neighbours of the structural fingerprints are searched by Tanimoto distance on the bit-packed
+            fingerprints and passed to t-SNE as a precomputed graph. Not used with PCA preprocessing.
+        :param landmarks: number of diverse molecules (picked by MaxMin) embedded by t-SNE, the other molecules are placed
+            at the distance-weighted mean of the coordinates of their nearest landmarks. None embeds all the molecules.
         :param kwargs: Other keyword arguments are passed down to sklearn.manifold.TSNE
         :type perplexity: int
         :type pca: boolean
         :type random_state: int
+        :type tanimoto: boolean
+        :type landmarks: int
         :type kwargs: key, value mappings
         :returns: The dataframe containing the t-SNE components.
         :rtype: Dataframe
         """
-        self.__data = self.__data_scaler()
-        self.__plot_title = "t-SNE plot"
-
-        # Preprocess the data with PCA
-        if pca and self.__sim_type == "structural":
-            _n_components = 10 if len(self.__data[0]) >= 10 else len(self.__data[0])
-            pca = PCA(n_components=_n_components, random_state=random_state)
-            self.__data = pca.fit_transform(self.__data)
-            self.__plot_title = "t-SNE plot from components with cumulative variance explained " + "{:.0%}".format(sum(pca.explained_variance_ratio_))
-        else:
-            self.__plot_title = "t-SNE plot"
+        tanimoto, reduction = self.__prepare_data("tsne", pca, tanimoto, landmarks, random_state)
 
         # Get the perplexity of the model
+        n_samples = self.__n_embedded()
         if perplexity is None:
-            if self.__sim_type == "structural":
-                if pca:
-                    perplexity = parameters.perplexity_structural_pca(len(self.__data))
-                else:
-                    perplexity = parameters.perplexity_structural(len(self.__data))
-            else:
-                perplexity = parameters.perplexity_tailored(len(self.__data))
+            perplexity = self.__default_perplexity(n_samples, pca)
         else:
-            if perplexity > len(self.__data):
-                raise ValueError(f"perplexity (got: {perplexity:.2f}) must be less than the number of samples ({len(self.__data):d}).")
-            if perplexity < 5 or perplexity > 50:
-                print("Robust results are obtained for values of perplexity between 5 and 50")
+            self.__check_perplexity(perplexity, n_samples)
 
         # Embed the data in two dimensions
-        self.tsne_fit = TSNE(n_components=2, perplexity=perplexity, random_state=random_state, **kwargs)
-        ecfp_tsne_embedding = self.tsne_fit.fit_transform(self.__data)
+        from sklearn.manifold import TSNE
+
+        metric = "tanimoto" if tanimoto else kwargs.get("metric", "euclidean")
+        if metric in ["euclidean", "tanimoto"] and kwargs.get("method", "barnes_hut") == "barnes_hut":
+            # Neighbours searched by t-SNE, the molecule itself included
+            n_neighbors = min(n_samples - 1, int(3.0 * perplexity + 1)) + 1
+            self.__neighbors_graph = self.__neighbors(metric, n_neighbors, pca, random_state)
+            init = kwargs.pop("init", "pca")
+            if isinstance(init, str) and init == "pca":
+                init = self.__tsne_init(random_state)
+            kwargs = {**kwargs, "metric": "precomputed", "init": init}
+            self.tsne_fit = TSNE(n_components=2, perplexity=perplexity, random_state=random_state, **kwargs)
+            ecfp_tsne_embedding = self.__fit_transform(self.tsne_fit, self.__neighbors_graph.distance_matrix(n_neighbors))
+        else:
+            self.__neighbors_graph = None
+            self.tsne_fit = TSNE(n_components=2, perplexity=perplexity, random_state=random_state, **kwargs)
+            ecfp_tsne_embedding = self.__fit_transform(self.tsne_fit)
+        self.__set_preprocessing("tsne", self.__scaler, reduction)
         # Create a dataframe containinting the first 2 TSNE components of ECFP
         self.__df_2_components = pd.DataFrame(data=ecfp_tsne_embedding, columns=["t-SNE-1", "t-SNE-2"])
 
@@ -275,55 +484,49 @@ class Plotter(object):
 
         return self.__df_2_components.copy()
 
-    def umap(self, n_neighbors=None, min_dist=None, pca=False, random_state=None, **kwargs):
+    def umap(self, n_neighbors=None, min_dist=None, pca=False, random_state=None, tanimoto=False, landmarks=None, **kwargs):
         """
         Calculates the first 2 UMAP components of the molecular descriptors.
 
         :param num_neighbors: Number of neighbours used in the UMAP madel.
         :param min_dist: Value between 0.0 and 0.99, indicates how close to each other the points can be displayed.
         :param random_state: random seed that can be passed as a parameter for reproducing the same results
-        :param kwargs: Other keyword arguments are passed down to umap.UMAP
+        :param tanimoto: if True the neighbours of the structural fingerprints are searched by Tanimoto distance on the bit-packed
+            fingerprints and passed to UMAP as a precomputed graph. Not used with PCA preprocessing.
+        :param landmarks: number of diverse molecules (picked by MaxMin) embedded by UMAP, the other molecules are placed
+            at the distance-weighted mean of the coordinates of their nearest landmarks. None embeds all the molecules.
+        :param kwargs: Other keyword arguments are passed down to umap.UMAP. Sparse fingerprints are passed as they are, so metric must support sparse input (e.g. "euclidean" or "jaccard").
         :type num_neighbors: int
         :type min_dist: float
         :type random_state: int
+        :type tanimoto: boolean
+        :type landmarks: int
         :type kwargs: key, value mappings
         :returns: The dataframe containing the UMAP components.
         :rtype: Dataframe
         """
-        self.__data = self.__data_scaler()
-
-        # Preprocess the data with PCA
-        if pca and self.__sim_type == "structural":
-            _n_components = 10 if len(self.__data[0]) >= 10 else len(self.__data[0])
-            pca = PCA(n_components=_n_components, random_state=random_state)
-            self.__data = pca.fit_transform(self.__data)
-            self.__plot_title = "UMAP plot from components with cumulative variance explained " + "{:.0%}".format(sum(pca.explained_variance_ratio_))
-        else:
-            self.__plot_title = "UMAP plot"
+        tanimoto, reduction = self.__prepare_data("umap", pca, tanimoto, landmarks, random_state)
 
         if n_neighbors is None:
-            if self.__sim_type == "structural":
-                if pca:
-                    n_neighbors = parameters.n_neighbors_structural_pca(len(self.__data))
-                else:
-                    n_neighbors = parameters.n_neighbors_structural(len(self.__data))
-            else:
-                n_neighbors = parameters.n_neighbors_tailored(len(self.__data))
+            n_neighbors = self.__default_n_neighbors(self.__n_embedded(), pca)
 
-        if min_dist is None or min_dist < 0.0 or min_dist > 0.99:
-            if min_dist is not None and (min_dist < 0.0 or min_dist > 0.99):
-                print("min_dist must range from 0.0 up to 0.99. Default used.")
-            if self.__sim_type == "structural":
-                if pca:
-                    min_dist = parameters.MIN_DIST_STRUCTURAL_PCA
-                else:
-                    min_dist = parameters.MIN_DIST_STRUCTURAL
-            else:
-                min_dist = parameters.MIN_DIST_TAILORED
+        min_dist = self.__check_min_dist(min_dist, pca)
 
         # Embed the data in two dimensions
+        import umap
+
+        metric = "tanimoto" if tanimoto else kwargs.get("metric", "euclidean")
+        if metric in ["euclidean", "tanimoto"] and "precomputed_knn" not in kwargs:
+            self.__neighbors_graph = self.__neighbors(metric, n_neighbors, pca, random_state)
+            # New molecules are placed from the graph by transform_smiles, UMAP does not need the search index
+            kwargs = {**kwargs, "metric": "jaccard" if tanimoto else metric, "precomputed_knn": self.__neighbors_graph.knn(n_neighbors)}
+        else:
+            self.__neighbors_graph = None
         self.umap_fit = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, random_state=random_state, n_components=2, **kwargs)
-        ecfp_umap_embedding = self.umap_fit.fit_transform(self.__data)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=_UMAP_NO_INDEX_WARNING)
+            ecfp_umap_embedding = self.__fit_transform(self.umap_fit)
+        self.__set_preprocessing("umap", self.__scaler, reduction)
         # Create a dataframe containinting the first 2 UMAP components of ECFP
         self.__df_2_components = pd.DataFrame(data=ecfp_umap_embedding, columns=["UMAP-1", "UMAP-2"])
 
@@ -332,30 +535,292 @@ class Plotter(object):
 
         return self.__df_2_components.copy()
 
-    def cluster(self, n_clusters=5, **kwargs):
+    def sweep(
+        self,
+        method="umap",
+        perplexity=None,
+        n_neighbors=None,
+        min_dist=None,
+        pca=False,
+        random_state=None,
+        tanimoto=False,
+        landmarks=None,
+        n_jobs=1,
+        **kwargs,
+    ):
         """
-        Computes the clusters presents in the embedded chemical space.
+        Calculates the t-SNE or UMAP components of the molecular descriptors for a grid of hyperparameters,
+        e.g. to tune the default perplexity and n_neighbors on a dataset. The values are checked as by tsne and
+        umap. With the euclidean or Tanimoto metric the neighbours graph is built once for the largest setting
+        and its leading neighbours are used by the smaller ones, so that each setting only computes its layout.
+        The layouts are computed in parallel processes. The embedding of the Plotter is left unchanged.
+
+        :param method: embedding swept, "tsne" or "umap"
+        :param perplexity: list of the perplexity values of t-SNE. The default value is used if None.
+        :param n_neighbors: list of the numbers of neighbours of UMAP. The default value is used if None.
+        :param min_dist: list of the min_dist values of UMAP. The default value is used if None.
+        :param pca: indicates if the features must be preprocessed by PCA
+        :param random_state: random seed that can be passed as a parameter for reproducing the same results
+        :param tanimoto: if True the neighbours of the structural fingerprints are searched by Tanimoto distance, by
+            euclidean distance otherwise
+        :param landmarks: number of diverse molecules embedded, the other molecules are placed from their nearest landmarks
+        :param n_jobs: Number of worker processes computing the layouts. -1 uses all the available CPUs.
+        :param kwargs: Other keyword arguments are passed down to sklearn.manifold.TSNE or umap.UMAP. With another
+            metric than euclidean each setting is fitted on the data, without the shared neighbours graph.
+        :type method: string
+        :type perplexity: list
+        :type n_neighbors: list
+        :type min_dist: list
+        :type pca: boolean
+        :type random_state: int
+        :type tanimoto: boolean
+        :type landmarks: int
+        :type n_jobs: int
+        :type kwargs: key, value mappings
+        :returns: The dataframe containing the 2 components of every setting, indexed by the setting and the molecule.
+            The seconds spent building the neighbours graph and computing each layout are stored in attrs["timings"].
+        :rtype: Dataframe
+        """
+        if method not in ["tsne", "umap"]:
+            print('The method of the sweep must be "tsne" or "umap".')
+            return None
 
-        :param n_clusters: Number of clusters that will be computed
-        :param kwargs: Other keyword arguments are passed down to sklearn.cluster.KMeans
-        :type n_clusters: int
+        # The sweep does not replace the embedding of the Plotter
+        state = (self.__data, self.__landmark_rows, self.__neighbors_graph, self.__plot_title)
+        try:
+            tanimoto, _ = self.__prepare_data(method, pca, tanimoto, landmarks, random_state)
+            n_samples = self.__n_embedded()
+            metric = "tanimoto" if tanimoto else kwargs.get("metric", "euclidean")
+            if method == "tsne":
+                names = ["perplexity"]
+                if perplexity is None:
+                    perplexity = [self.__default_perplexity(n_samples, pca)]
+                for value in perplexity:
+                    self.__check_perplexity(value, n_samples)
+                settings = [(value,) for value in perplexity]
+                # Neighbours searched by t-SNE, the molecule itself included
+                sizes = [min(n_samples - 1, int(3.0 * value + 1)) + 1 for value, in settings]
+                columns = ["t-SNE-1", "t-SNE-2"]
+                shared_graph = metric in ["euclidean", "tanimoto"] and kwargs.get("method", "barnes_hut") == "barnes_hut"
+            else:
+                names = ["n_neighbors", "min_dist"]
+                n_neighbors = n_neighbors or [self.__default_n_neighbors(n_samples, pca)]
+                # Out of range values are replaced by the default one, which is only swept once
+                min_dist = list(dict.fromkeys(self.__check_min_dist(value, pca) for value in (min_dist or [None])))
+                settings = list(itertools.product(n_neighbors, min_dist))
+                sizes = [value for value, _ in settings]
+                columns = ["UMAP-1", "UMAP-2"]
+                shared_graph = metric in ["euclidean", "tanimoto"] and "precomputed_knn" not in kwargs
+
+            timings = {}
+            data = self.__embedded_data()
+            if shared_graph:
+                start = time.perf_counter()
+                self.__neighbors_graph = self.__neighbors(metric, max(sizes), pca, random_state)
+                timings["neighbors"] = time.perf_counter() - start
+            else:
+                self.__neighbors_graph = None
+
+            # Each setting is fitted on the leading neighbours of the graph it needs, or on the data for other metrics
+            if method == "tsne" and shared_graph:
+                init = kwargs.pop("init", "pca")
+                if isinstance(init, str) and init == "pca":
+                    init = self.__tsne_init(random_state)
+                kwargs = {**kwargs, "metric": "precomputed", "init": init}
+                layouts = [({**kwargs, "perplexity": value}, self.__neighbors_graph.distance_matrix(size)) for (value,), size in zip(settings, sizes)]
+            elif method == "tsne":
+                layouts = [({**kwargs, "perplexity": value}, data) for value, in settings]
+            elif shared_graph:
+                kwargs = {**kwargs, "metric": "jaccard" if tanimoto else metric}
+                layouts = [
+                    ({**kwargs, "n_neighbors": k, "min_dist": value, "precomputed_knn": self.__neighbors_graph.knn(k)}, data) for k, value in settings
+                ]
+            else:
+                layouts = [({**kwargs, "n_neighbors": k, "min_dist": value}, data) for k, value in settings]
+            results = map_chunks(_layout_chunk, layouts, n_jobs, args=(method, random_state))
+
+            df_settings = []
+            for setting, (components, seconds) in zip(settings, results):
+                df_setting = pd.DataFrame(data=self.__expand_components(components), columns=columns)
+                if len(self.__target) > 0:
+                    df_setting["target"] = self.__target
+                df_settings.append(df_setting)
+                timings[", ".join(f"{name}={value}" for name, value in zip(names, setting))] = seconds
+            keys = settings if len(names) > 1 else [value for value, in settings]
+            df_sweep = pd.concat(df_settings, keys=keys, names=names + [None])
+            df_sweep.attrs["timings"] = timings
+        finally:
+            self.__data, self.__landmark_rows, self.__neighbors_graph, self.__plot_title = state
+
+        return df_sweep
+
+    def transform_smiles(self, smiles_list, n_neighbors=5):
+        """
+        Places new molecules in the embedding computed last, without recomputing it.
+        The new molecules are described with the same descriptors (or fingerprint bits) and scaling as the plotted ones.
+        PCA projects them with the fitted model, t-SNE and UMAP place them at the distance-weighted mean of the
+        coordinates of their nearest plotted molecules in the neighbours graph of the embedding.
+
+        :param smiles_list: List of the SMILES representation of the new molecules
+        :param n_neighbors: Number of plotted molecules used to place each new molecule in a t-SNE or UMAP embedding
+        :type smiles_list: list
+        :type n_neighbors: int
+        :returns: The dataframe containing the 2 components of the new molecules, indexed by their position in smiles_list.
+        :rtype: Dataframe
+        """
+        if self.__df_2_components is None:
+            print("Reduce the dimensions of your molecules before transforming new ones.")
+            return None
+
+        columns = self.__df_2_components.columns[:2]
+        molecule_set = MoleculeSet.from_smiles(smiles_list)
+        if self.__sim_type == "tailored":
+            _, df_descriptors, _ = desc.get_mordred_descriptors(molecule_set, [])
+            rows = df_descriptors.index.to_numpy()
+        else:
+            _, df_descriptors, _ = desc.get_ecfp(molecule_set, [], 2, 2048, sparse=self.__sparse, columns=self.__df_descriptors.columns)
+            rows = np.flatnonzero(molecule_set.valid)
+        if len(rows) == 0:
+            return pd.DataFrame(columns=columns, dtype=np.float64)
+
+        # Apply the fitted preprocessing to the descriptors selected for the plotted molecules
+        df_descriptors = df_descriptors[self.__df_descriptors.columns]
+        if self.__sparse:
+            data = df_descriptors.sparse.to_coo().tocsr()
+        else:
+            data = np.ascontiguousarray(df_descriptors.values, dtype=np.float64)
+        for step in self.__preprocessing:
+            data = step.transform(data)
+
+        if self.__neighbors_graph is not None:
+            from chemplot.neighbors import pack_fingerprints
+
+            # Interpolate the coordinates of the nearest embedded molecules in the neighbours graph of the embedding
+            if self.__neighbors_graph.metric == "tanimoto":
+                data = pack_fingerprints(data)
+            indices, distances = self.__neighbors_graph.kneighbors(data, n_neighbors)
+            components = self.__interpolate(indices, distances, self.__embedded_coordinates(columns))
+        elif self.__embedding == "tsne":
+            from sklearn.neighbors import NearestNeighbors
+
+            # t-SNE has no transform, interpolate the coordinates of the nearest plotted molecules
+            neighbors = NearestNeighbors(n_neighbors=min(n_neighbors, self.__data.shape[0])).fit(self.__data)
+            distances, indices = neighbors.kneighbors(data)
+            components = self.__interpolate(indices, distances, self.__df_2_components[columns].values)
+        elif self.__embedding == "umap":
+            components = self.umap_fit.transform(data)
+        else:
+            if isinstance(self.pca_fit, IncrementalPCA) and issparse(data):
+                # The incremental PCA is fitted on dense batches
+                data = data.toarray()
+            components = self.pca_fit.transform(data)
+
+        return pd.DataFrame(data=components, index=rows, columns=columns)
+
+    def cluster(self, n_clusters=5, algorithm="kmeans", space="embedding", k_range=range(2, 30), score="silhouette", n_jobs=1, **kwargs):
+        """
+        Computes the clusters presents in the embedded chemical space.
+        k-means clusters keep the labels of sklearn. HDBSCAN and Butina clusters are numbered from the largest one,
+        molecules not assigned to a cluster are labelled -1.
+
+        :param n_clusters: Number of clusters that will be computed, or "auto" to select the one of k_range with the best
+            score. Not used by HDBSCAN and Butina, which find the clusters by density and by Tanimoto distance threshold.
+        :param algorithm: Clustering algorithm: kmeans (sklearn.cluster.KMeans), minibatch (sklearn.cluster.MiniBatchKMeans,
+            fitted on batches of molecules for large sets), hdbscan (sklearn.cluster.HDBSCAN) or butina (Butina clustering
+            of the structural fingerprints, see chemplot.clustering.butina).
+        :param space: Space in which the molecules are clustered: embedding (the 2 components of the plot) or descriptors
+            (the scaled descriptors or the fingerprints the embedding has been computed from). Butina always clusters
+            the fingerprints.
+        :param k_range: Candidate numbers of clusters if n_clusters is "auto"
+        :param score: Score selecting the number of clusters: silhouette (computed on a random sample of the molecules) or
+            calinski_harabasz
+        :param n_jobs: Number of worker processes scoring the candidate numbers of clusters or comparing the fingerprints
+            for Butina. -1 uses all the available CPUs.
+        :param kwargs: Other keyword arguments are passed down to the sklearn.cluster estimator, or to
+            chemplot.clustering.butina (e.g. threshold)
+        :type n_clusters: int or string
+        :type algorithm: string
+        :type space: string
+        :type k_range: range
+        :type score: string
+        :type n_jobs: int
         :type kwargs: key, value mappings
-        :returns: The dataframe containing the 2D embedding.
+        :returns: The dataframe containing the 2D embedding. If n_clusters is "auto", the selected number of clusters and the
+            score of each candidate are stored in attrs["n_clusters"] and attrs["scores"].
         :rtype: Dataframe
         """
         if self.__df_2_components is None:
             print("Reduce the dimensions of your molecules before clustering.")
             return None
 
-        x = self.__df_2_components.columns[0]
-        y = self.__df_2_components.columns[1]
+        if algorithm not in self._cluster_algorithms:
+            print(
+                "algorithm indicates how the molecules are clustered. Currently supported algorithms are:\n"
+                + "-k-means (kmeans)\n"
+                + "-mini-batch k-means (minibatch)\n"
+                + "-HDBSCAN (hdbscan)\n"
+                + "-Butina clustering of the structural fingerprints (butina)\n"
+                + "k-means has been selected."
+            )
+            algorithm = "kmeans"
+        if algorithm == "butina" and self.__sim_type != "structural":
+            print("Butina clustering is only available for structural fingerprints. k-means has been selected.")
+            algorithm = "kmeans"
+        if space not in self._cluster_spaces:
+            print(
+                "space indicates where the molecules are clustered. Currently supported spaces are:\n"
+                + "-the 2D embedding (embedding)\n"
+                + "-the molecular descriptors (descriptors)\n"
+                + "The 2D embedding has been selected."
+            )
+            space = "embedding"
+        if score not in self._cluster_scores:
+            print(
+                "score indicates how the number of clusters is selected. Currently supported scores are:\n"
+                + "-the silhouette (silhouette)\n"
+                + "-the Calinski-Harabasz index (calinski_harabasz)\n"
+                + "The silhouette has been selected."
+            )
+            score = "silhouette"
 
-        cluster = KMeans(n_clusters, **kwargs)
+        if space == "descriptors" or algorithm == "butina":
+            data = self.__data_scaler()
+        else:
+            x = self.__df_2_components.columns[0]
+            y = self.__df_2_components.columns[1]
+            data = self.__df_2_components[[x, y]].values
 
-        cluster.fit(self.__df_2_components[[x, y]])
-        self.__df_2_components["clusters"] = cluster.labels_.tolist()
+        scores = None
+        if algorithm == "butina":
+            from chemplot.clustering import butina
+            from chemplot.neighbors import pack_fingerprints
 
-        return self.__df_2_components.copy()
+            labels = butina(pack_fingerprints(data), n_jobs=n_jobs, **kwargs)
+        else:
+            # sklearn.cluster imports sklearn.manifold, both are imported on first use
+            from sklearn.cluster import HDBSCAN, KMeans, MiniBatchKMeans
+
+            if n_clusters == "auto" and algorithm != "hdbscan":
+                from chemplot.clustering import select_n_clusters
+
+                n_clusters, scores = select_n_clusters(data, k_range, algorithm, score, n_jobs, **kwargs)
+            if algorithm == "minibatch":
+                cluster = MiniBatchKMeans(n_clusters, **kwargs)
+            elif algorithm == "hdbscan":
+                cluster = HDBSCAN(**kwargs)
+            else:
+                cluster = KMeans(n_clusters, **kwargs)
+            labels = cluster.fit_predict(data)
+
+        if algorithm in ["hdbscan", "butina"]:
+            labels = self.__sort_clusters(labels)
+        self.__df_2_components["clusters"] = labels.tolist()
+
+        df_clusters = self.__df_2_components.copy()
+        if scores is not None:
+            df_clusters.attrs["n_clusters"] = n_clusters
+            df_clusters.attrs["scores"] = scores
+        return df_clusters
 
     def visualize_plot(
         self, size=20, kind="scatter", remove_outliers=False, is_colored=True, colorbar=False, clusters=False, filename=None, title=None
@@ -364,10 +829,13 @@ class Plotter(object):
         Generates a plot for the given molecules embedded in two dimensions.
 
         :param size: Size of the plot
-        :param kind: Type of plot
+        :param kind: Type of plot: scatter, hex, kde or raster. A raster plot aggregates the molecules in a grid of
+            parameters.RASTER_BINS bins per side drawn as a single image, for sets too large for a scatter plot. Each bin
+            is colored by the mean target or the mix of classes or clusters of its molecules, and shaded by their number.
         :param remove_outliers: Boolean value indicating if the outliers must be identified and removed
         :param is_colored: Indicates if the points must be colored according to target
         :param colorbar: Indicates if the plot legend must be represented as a colorbar. Only considered when the target_type is "R".
+            Raster plots always represent a continuous target by a colorbar.
         :param clusters: If True the clusters are shown instead of possible targets. Pass a list or a int to only show selected clusters (indexed by int).
         :param filename: Indicates the file where to save the plot
         :param title: Title of the plot.
@@ -382,6 +850,9 @@ class Plotter(object):
         :returns: The matplotlib axes containing the plot.
         :rtype: Axes
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         if self.__df_2_components is None:
             print("Reduce the dimensions of your molecules before creating a plot.")
             return None
@@ -399,7 +870,8 @@ class Plotter(object):
                 + "-scatter plot (scatter)\n"
                 + "-hexagon plot (hex)\n"
                 + "-kernel density estimation plot (kde)\n"
-                + "Please input one between scatter, hex or kde for parameter kind.\n"
+                + "-rasterized scatter plot for large sets (raster)\n"
+                + "Please input one between scatter, hex, kde or raster for parameter kind.\n"
                 + "As default scatter has been taken."
             )
 
@@ -469,6 +941,10 @@ class Plotter(object):
             plot = sns.kdeplot(x=x, y=y, fill=True, data=df_data)
             plot.set_label("kde")
             axis = plot
+        elif kind == "raster":
+            self.__raster_plot(ax, x, y, df_data, hue, hue_order, size)
+            ax.set_label("raster")
+            axis = ax
 
         # Remove units from axis
         axis.set(yticks=[])
@@ -496,6 +972,11 @@ class Plotter(object):
         filename=None,
         show_plot=False,
         title=None,
+        images="embedded",
+        n_jobs=1,
+        cache_dir=None,
+        output_backend="canvas",
+        lod=False,
     ):
         """
         Generates an interactive Bokeh plot for the given molecules embedded in two dimensions.
@@ -508,6 +989,19 @@ class Plotter(object):
         :param filename: Indicates the file where to save the Bokeh plot
         :param show_plot: Immediately display the current plot.
         :param title: Title of the plot.
+        :param images: How the images of the molecules shown by the tooltips are created: embedded (rendered for every
+            molecule and embedded in the plot) or browser (rendered by RDKit.js in the browser from the SMILES of a molecule
+            when it is first hovered, so that building the plot does not depend on the number of images). Browser rendering
+            loads RDKit.js from parameters.RDKIT_JS.
+        :param n_jobs: Number of worker processes rendering the embedded images. -1 uses all the available CPUs.
+        :param cache_dir: directory of an on-disk cache of the embedded images, so that only new molecules are rendered.
+            The images are also cached in memory for the session.
+        :param output_backend: Bokeh backend drawing the plot: canvas, webgl (GPU drawing, which keeps plots of hundreds of
+            thousands of molecules responsive) or svg.
+        :param lod: If True the scatter plot shows a level of detail of the molecules depending on the zoom. The plot
+            embeds a subsample of the molecules, denser in sparse regions, over a hexagon density layer of all of them.
+            Denser tiles of molecules are written next to filename (in a directory named after it) and loaded by the
+            plot and its clusters tab as the user zooms in. Requires filename.
         :type size: int
         :type kind: string
         :type remove_outliers: boolean
@@ -516,6 +1010,11 @@ class Plotter(object):
         :type filename: string
         :type show_plot: boolean
         :type title: string
+        :type images: string
+        :type n_jobs: int
+        :type cache_dir: string
+        :type output_backend: string
+        :type lod: boolean
         :returns: The bokeh figure containing the plot.
         :rtype: Figure
         """
@@ -539,8 +1038,36 @@ class Plotter(object):
                 + "As default scatter has been taken."
             )
 
+        if images not in self._interactive_images:
+            images = "embedded"
+            print(
+                "images indicates how the images of the molecules are created. Currently supported images are:\n"
+                + "-rendered for every molecule and embedded in the plot (embedded)\n"
+                + "-rendered in the browser when a molecule is hovered (browser)\n"
+                + "As default embedded has been taken."
+            )
+
+        if output_backend not in self._output_backends:
+            output_backend = "canvas"
+            print(
+                "output_backend indicates how the plot is drawn by the browser. Currently supported backends are:\n"
+                + "-HTML5 canvas (canvas)\n"
+                + "-WebGL, for large sets (webgl)\n"
+                + "-SVG (svg)\n"
+                + "As default canvas has been taken."
+            )
+
+        if lod and filename is None:
+            lod = False
+            print("The level of detail needs a filename to write its tiles next to the plot. All the molecules have been plotted.")
+
         x, y, df_data = self.__parse_dataframe()
         df_data["mols"] = self.__mols
+        if self.__smiles is None:
+            from rdkit import Chem
+
+            self.__smiles = [Chem.MolToSmiles(mol) for mol in self.__mols]
+        df_data["smiles"] = self.__smiles
 
         if len(self.__target) > 0:
             # Target exists
@@ -555,9 +1082,11 @@ class Plotter(object):
 
         tabs = None
         if kind == "scatter":
-            p, tabs = self.__interactive_scatter(x, y, df_data, size, is_colored, clusters, title)
+            p, tabs = self.__interactive_scatter(
+                x, y, df_data, size, is_colored, clusters, title, images, n_jobs, cache_dir, output_backend, lod, filename
+            )
         else:
-            p = self.__interactive_hex(x, y, df_data, size, title)
+            p = self.__interactive_hex(x, y, df_data, size, title, output_backend)
 
         p.xaxis[0].axis_label = x
         p.yaxis[0].axis_label = y
@@ -574,6 +1103,8 @@ class Plotter(object):
 
         # Save plot
         if filename is not None:
+            from bokeh.io import output_file, save
+
             output_file(filename, title=title)
             save(p)
 
@@ -586,13 +1117,329 @@ class Plotter(object):
         return p
 
     def __data_scaler(self):
-        # Scale the data
-        if self.__sim_type != "structural":
-            scaled_data = StandardScaler().fit_transform(self.__df_descriptors.values.tolist())
+        # Scale the data once, the scaled matrix is reused until the descriptors change
+        if self.__scaled_descriptors is not self.__df_descriptors:
+            self.__scaler = None
+            if self.__sparse:
+                scaled_data = self.__df_descriptors.sparse.to_coo().tocsr()
+            elif self.__sim_type != "structural":
+                self.__scaler = StandardScaler()
+                scaled_data = np.ascontiguousarray(self.__scaler.fit_transform(self.__df_descriptors.values), dtype=np.float64)
+            else:
+                scaled_data = np.ascontiguousarray(self.__df_descriptors.values, dtype=np.float64)
+            self.__scaled_data = scaled_data
+            self.__reduced_data = {}
+            self.__neighbors_graphs = {}
+            self.__landmarks = {}
+            self.__scaled_descriptors = self.__df_descriptors
+
+        return self.__scaled_data
+
+    def __set_preprocessing(self, embedding, *steps):
+        # Remember the embedding computed last and the fitted steps applied to the descriptors before it
+        self.__embedding = embedding
+        self.__preprocessing = [step for step in steps if step is not None]
+
+    def __reduce_data(self, n_components, random_state):
+        # Reduce the scaled data to its leading components (returning the fitted model as well),
+        # the reduction is reused for the same parameters.
+        # Random states which are not seeds (e.g. numpy.random.RandomState) are not reproducible and never reused.
+        data = self.__data_scaler()
+        key = (n_components, random_state)
+        if random_state is not None and not isinstance(random_state, (int, np.integer)):
+            key = None
+        if key not in self.__reduced_data:
+            model = self.__pca_model(n_components, random_state=random_state)
+            reduced_data = (model.fit_transform(data), sum(model.explained_variance_ratio_), model)
+            if key is None:
+                return reduced_data
+            self.__reduced_data[key] = reduced_data
+
+        return self.__reduced_data[key]
+
+    def __pca_model(self, n_components, **kwargs):
+        # Truncated SVD works on sparse matrices without centering (densifying) them
+        if self.__sparse:
+            return TruncatedSVD(n_components=n_components, **kwargs)
+        return PCA(n_components=n_components, **kwargs)
+
+    def __embedded_rows(self):
+        # Rows of the data fitted by the embeddings: the landmarks, the unique molecules or all of them (None)
+        if self.__landmark_rows is not None:
+            return self.__landmark_rows
+        return self.__unique_rows
+
+    def __n_embedded(self):
+        # Number of points fitted by the embeddings
+        if self.__embedded_rows() is None:
+            return self.__data.shape[0]
+        return len(self.__embedded_rows())
+
+    def __embedded_data(self):
+        # Rows of the data fitted by the embeddings
+        if self.__embedded_rows() is None:
+            return self.__data
+        return self.__data[self.__embedded_rows()]
+
+    def __fit_transform(self, model, data=None):
+        # Fit the model on the landmarks or the unique molecules only (if requested), place the other molecules
+        # from their nearest landmarks and give duplicates the coordinates of their molecule.
+        # data replaces the embedded rows of the data, e.g. by their precomputed distances.
+        if data is None:
+            data = self.__embedded_data()
+        return self.__expand_components(model.fit_transform(data))
+
+    def __expand_components(self, components):
+        # Components of all the molecules from the components of the embedded ones
+        if self.__landmark_rows is not None:
+            components = self.__place_molecules(components)
+        if self.__unique_rows is None:
+            return components
+        return components[self.__unique_inverse]
+
+    def __place_molecules(self, landmark_components):
+        # Place the molecules (the unique ones if requested) at the interpolated coordinates of their nearest landmarks.
+        # The landmarks are searched in the neighbours graph of the embedding, by euclidean distance for other metrics.
+        from chemplot.neighbors import EuclideanNeighbors, pack_fingerprints
+
+        data = self.__data if self.__unique_rows is None else self.__data[self.__unique_rows]
+        graph = self.__neighbors_graph
+        if graph is None:
+            graph = EuclideanNeighbors(parameters.LANDMARK_NEIGHBORS).fit(self.__embedded_data())
+        if graph.metric == "tanimoto":
+            data = pack_fingerprints(data)
+        indices, distances = graph.kneighbors(data, parameters.LANDMARK_NEIGHBORS)
+        return self.__interpolate(indices, distances, landmark_components)
+
+    def __select_landmarks(self, landmarks, tanimoto, random_state):
+        # Pick diverse landmarks by MaxMin among a random pool of the embedded molecules, the landmarks are reused
+        # for the same parameters. Random states which are not seeds are not reproducible and never reused.
+        if landmarks is None:
+            return None
+        rows = np.arange(self.__data.shape[0]) if self.__unique_rows is None else self.__unique_rows
+        if landmarks >= len(rows):
+            print("The number of landmarks is not smaller than the number of molecules. All the molecules are embedded.")
+            return None
+
+        key = (landmarks, tanimoto, id(self.__data), random_state)
+        if random_state is not None and not isinstance(random_state, (int, np.integer)):
+            key = None
+        if key in self.__landmarks:
+            return self.__landmarks[key][1]
+
+        from chemplot.neighbors import maxmin, pack_fingerprints
+
+        generator = random_state if isinstance(random_state, np.random.RandomState) else np.random.RandomState(random_state)
+        pool_size = min(len(rows), parameters.LANDMARK_POOL_FACTOR * landmarks)
+        pool = np.sort(generator.choice(rows, pool_size, replace=False))
+        data = pack_fingerprints(self.__data[pool]) if tanimoto else self.__data[pool]
+        landmark_rows = np.sort(pool[maxmin(data, landmarks, "tanimoto" if tanimoto else "euclidean", generator)])
+        if key is not None:
+            # Only keep the landmarks of the data still cached
+            self.__landmarks = {
+                cached_key: (cached_data, cached_rows)
+                for cached_key, (cached_data, cached_rows) in self.__landmarks.items()
+                if any(cached_data is cached for cached in self.__cached_data())
+            }
+            self.__landmarks[key] = (self.__data, landmark_rows)
+        return landmark_rows
+
+    def __cached_data(self):
+        # Scaled and reduced data the neighbours graphs and landmarks can be reused for
+        return [self.__scaled_data, self.__data] + [reduced_data for reduced_data, _, _ in self.__reduced_data.values()]
+
+    def __embedded_coordinates(self, columns):
+        # Coordinates of the rows of the data fitted by the embedding
+        coordinates = self.__df_2_components[columns].values
+        if self.__embedded_rows() is None:
+            return coordinates
+        return coordinates[self.__embedded_rows()]
+
+    def __interpolate(self, indices, distances, coordinates):
+        # Inverse distance weighted mean of the coordinates of the neighbours
+        weights = 1.0 / np.maximum(distances, 1e-12)
+        coordinates = coordinates[indices]
+        return (coordinates * weights[:, :, np.newaxis]).sum(axis=1) / weights.sum(axis=1)[:, np.newaxis]
+
+    def __check_tanimoto(self, tanimoto, pca):
+        # The Tanimoto graph is built on the fingerprint bits
+        if tanimoto and (self.__sim_type != "structural" or pca):
+            print("The Tanimoto neighbours graph is only available for structural fingerprints without PCA preprocessing.")
+            return False
+        return tanimoto
+
+    def __prepare_data(self, method, pca, tanimoto, landmarks, random_state):
+        # Set the data embedded by t-SNE or UMAP, its plot title and landmarks.
+        # Returns if the Tanimoto neighbours graph is used and the fitted reduction of the data (None if not reduced).
+        self.__data = self.__data_scaler()
+        reduction = None
+        title = "t-SNE plot" if method == "tsne" else "UMAP plot"
+        tanimoto = self.__check_tanimoto(tanimoto, pca)
+
+        # Preprocess the data with PCA
+        if pca and self.__sim_type == "structural":
+            _n_components = 10 if self.__data.shape[1] >= 10 else self.__data.shape[1]
+            self.__data, explained_variance, reduction = self.__reduce_data(_n_components, random_state)
+            self.__plot_title = title + " from components with cumulative variance explained " + "{:.0%}".format(explained_variance)
         else:
-            scaled_data = self.__df_descriptors.values.tolist()
+            if method == "tsne" and self.__sparse and not tanimoto:
+                # t-SNE needs dense input, embed the leading singular components instead
+                _n_components = 50 if self.__data.shape[1] >= 50 else self.__data.shape[1]
+                self.__data, _, reduction = self.__reduce_data(_n_components, random_state)
+            self.__plot_title = title
+        self.__landmark_rows = self.__select_landmarks(landmarks, tanimoto, random_state)
+        return tanimoto, reduction
+
+    def __default_perplexity(self, n_samples, pca):
+        if self.__sim_type == "structural":
+            if pca:
+                return parameters.perplexity_structural_pca(n_samples)
+            return parameters.perplexity_structural(n_samples)
+        return parameters.perplexity_tailored(n_samples)
+
+    def __default_n_neighbors(self, n_samples, pca):
+        if self.__sim_type == "structural":
+            if pca:
+                return parameters.n_neighbors_structural_pca(n_samples)
+            return parameters.n_neighbors_structural(n_samples)
+        return parameters.n_neighbors_tailored(n_samples)
+
+    def __check_perplexity(self, perplexity, n_samples):
+        if perplexity >= n_samples:
+            raise ValueError(f"perplexity (got: {perplexity:.2f}) must be less than the number of samples ({n_samples:d}).")
+        if perplexity < 5 or perplexity > 50:
+            print("Robust results are obtained for values of perplexity between 5 and 50")
+
+    def __check_min_dist(self, min_dist, pca):
+        # The default min_dist replaces a missing or out of range value
+        if min_dist is None or min_dist < 0.0 or min_dist > 0.99:
+            if min_dist is not None:
+                print("min_dist must range from 0.0 up to 0.99. Default used.")
+            return self.__default_min_dist(pca)
+        return min_dist
+
+    def __default_min_dist(self, pca):
+        if self.__sim_type == "structural":
+            if pca:
+                return parameters.MIN_DIST_STRUCTURAL_PCA
+            return parameters.MIN_DIST_STRUCTURAL
+        return parameters.MIN_DIST_TAILORED
+
+    def __neighbors(self, metric, n_neighbors, pca, random_state):
+        # Neighbours graph of the embedded rows of the data, shared by t-SNE and UMAP and by repeated calls.
+        # A graph is built once for the larger of the default t-SNE and UMAP neighbours and rebuilt only if more are needed.
+        key = (metric, id(self.__data), id(self.__landmark_rows))
+        if key in self.__neighbors_graphs:
+            _, _, graph = self.__neighbors_graphs[key]
+            if graph.indices.shape[1] >= min(n_neighbors, len(graph.indices)):
+                return graph
+
+        from chemplot.neighbors import (
+            EuclideanNeighbors,
+            TanimotoNeighbors,
+            pack_fingerprints,
+        )
+
+        n_samples = self.__n_embedded()
+        tsne_neighbors = min(n_samples - 1, int(3.0 * self.__default_perplexity(n_samples, pca) + 1)) + 1
+        n_neighbors = max(n_neighbors, tsne_neighbors, self.__default_n_neighbors(n_samples, pca))
+        if metric == "tanimoto":
+            graph = TanimotoNeighbors(n_neighbors, random_state=random_state).fit(pack_fingerprints(self.__embedded_data()))
+        else:
+            graph = EuclideanNeighbors(n_neighbors, random_state=random_state).fit(self.__embedded_data())
+
+        # Only keep the graphs of the data and landmarks still cached
+        cached_landmarks = [None] + [landmark_rows for _, landmark_rows in self.__landmarks.values()]
+        self.__neighbors_graphs = {
+            cached_key: (data, landmark_rows, cached_graph)
+            for cached_key, (data, landmark_rows, cached_graph) in self.__neighbors_graphs.items()
+            if any(data is cached for cached in self.__cached_data()) and any(landmark_rows is cached for cached in cached_landmarks)
+        }
+        self.__neighbors_graphs[key] = (self.__data, self.__landmark_rows, graph)
+        return graph
+
+    def __tsne_init(self, random_state):
+        # sklearn does not initialize t-SNE by PCA on precomputed distances, so compute the initialization as TSNE does
+        data = self.__embedded_data()
+        if issparse(data):
+            return "random"
+        init = PCA(n_components=2, random_state=random_state).fit_transform(data).astype(np.float32, copy=False)
+        return init / np.std(init[:, 0]) * 1e-4
+
+    def __incremental_fit_transform(self, model, batch_size):
+        # Fit an incremental model on batches of molecules, scaling each batch on the fly
+        n_features = self.__df_descriptors.shape[1]
+        if batch_size is None:
+            batch_size = 5 * n_features
+        scaler = None
+        if self.__sim_type != "structural":
+            scaler = StandardScaler()
+            for batch in self.__descriptors_batches(batch_size):
+                scaler.partial_fit(batch)
 
-        return np.array(scaled_data)
+        scale = (lambda batch: batch) if scaler is None else scaler.transform
+        for batch in self.__descriptors_batches(batch_size, self.__unique_rows, min_batch_size=model.n_components):
+            model.partial_fit(scale(batch))
+
+        return np.vstack([model.transform(scale(batch)) for batch in self.__descriptors_batches(batch_size)]), scaler
+
+    def __descriptors_batches(self, batch_size, rows=None, min_batch_size=0):
+        # Dense float batches of the descriptors of the given rows (all by default), read without copying the whole matrix
+        if self.__sparse:
+            values = self.__df_descriptors.sparse.to_coo().tocsr()
+        else:
+            values = self.__df_descriptors.values
+        n_rows = values.shape[0] if rows is None else len(rows)
+        for batch in gen_batches(n_rows, batch_size, min_batch_size=min_batch_size):
+            batch = values[batch] if rows is None else values[rows[batch]]
+            yield batch.toarray().astype(np.float64) if self.__sparse else np.asarray(batch, dtype=np.float64)
+
+    def __raster_plot(self, ax, x, y, df_data, hue, hue_order, size):
+        # Aggregate the molecules in a grid of bins drawn as a single image. Bins are colored by the mean target or by
+        # the mix of the colors of their classes, and their opacity grows with the log of their number of molecules.
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from matplotlib.colors import LogNorm, Normalize
+        from matplotlib.patches import Patch
+
+        bins = parameters.RASTER_BINS
+        xs = df_data[x].to_numpy(dtype=np.float64)
+        ys = df_data[y].to_numpy(dtype=np.float64)
+        extent = (xs.min(), xs.max(), ys.min(), ys.max())
+        # Bin of each molecule, the molecules on the upper edges are put in the last bins
+        ix = np.minimum(((xs - extent[0]) / ((extent[1] - extent[0]) or 1.0) * bins).astype(np.int64), bins - 1)
+        iy = np.minimum(((ys - extent[2]) / ((extent[3] - extent[2]) or 1.0) * bins).astype(np.int64), bins - 1)
+        flat = iy * bins + ix
+        counts = np.bincount(flat, minlength=bins * bins)
+        filled = counts > 0
+        alpha = np.zeros(bins * bins)
+        alpha[filled] = 0.4 + 0.6 * np.log1p(counts[filled]) / np.log1p(counts.max())
+
+        image_kwargs = {"origin": "lower", "extent": extent, "aspect": "auto", "interpolation": "nearest"}
+        if hue is None:
+            image = ax.imshow(np.ma.masked_equal(counts.reshape(bins, bins), 0), cmap="Blues", norm=LogNorm(), **image_kwargs)
+            ax.figure.colorbar(image, ax=ax)
+        elif hue == "target" and self.__target_type == "R":
+            target = df_data["target"].to_numpy(dtype=np.float64)
+            mean = np.zeros(bins * bins)
+            mean[filled] = np.bincount(flat, weights=target, minlength=bins * bins)[filled] / counts[filled]
+            norm = Normalize(target.min(), target.max())
+            cmap = plt.get_cmap("inferno")
+            rgba = cmap(norm(mean))
+            rgba[:, 3] = alpha
+            ax.imshow(rgba.reshape(bins, bins, 4), **image_kwargs)
+            ax.figure.colorbar(plt.cm.ScalarMappable(cmap=cmap, norm=norm), ax=ax)
+        else:
+            categories = hue_order if hue_order is not None else sorted(df_data[hue].unique())
+            codes = pd.Categorical(df_data[hue], categories=categories).codes.astype(np.int64)
+            class_counts = np.bincount(codes * bins * bins + flat, minlength=len(categories) * bins * bins).reshape(len(categories), -1)
+            colors = np.array(sns.color_palette("deep", len(categories)))
+            rgba = np.zeros((bins * bins, 4))
+            rgba[filled, :3] = class_counts[:, filled].T @ colors / counts[filled, np.newaxis]
+            rgba[:, 3] = alpha
+            ax.imshow(rgba.reshape(bins, bins, 4), **image_kwargs)
+            handles = [Patch(color=color, label=str(category)) for color, category in zip(colors, categories)]
+            ax.legend(handles=handles, title=hue)
 
     def __parse_dataframe(self):
         x = self.__df_2_components.columns[0]
@@ -602,12 +1449,24 @@ class Plotter(object):
 
     def __remove_outliers(self, x, y, df):
         # Remove outliers (using Z-score)
+        from scipy import stats
+
         z_scores = stats.zscore(df[[x, y]])
         abs_z_scores = np.abs(z_scores)
         filtered_entries = (abs_z_scores < 3).all(axis=1)
 
         return df[filtered_entries]
 
+    def __sort_clusters(self, labels):
+        # Number the clusters from the largest one, the molecules not assigned to a cluster keep the label -1
+        clustered = labels >= 0
+        sorted_labels = np.full(len(labels), -1, dtype=np.int64)
+        _, inverse, counts = np.unique(labels[clustered], return_inverse=True, return_counts=True)
+        ranks = np.empty(len(counts), dtype=np.int64)
+        ranks[np.argsort(-counts, kind="stable")] = np.arange(len(counts))
+        sorted_labels[clustered] = ranks[inverse]
+        return sorted_labels
+
     def __percentage_clusters(self, df_data):
         total = df_data["clusters"].value_counts()
         sum_tot = total.sum()
@@ -617,65 +1476,152 @@ class Plotter(object):
             p = float(f"{(value/sum_tot)*100:.0f}")
             labels[key] = p
             count += p
-        # Solve possible rounding errors
+        # Solve possible rounding errors on the largest cluster
         if 100 - count > 0:
-            labels[0] = labels[0] + 100 - count
+            largest = total.index[0]
+            labels[largest] = labels[largest] + 100 - count
         for key, value in labels.items():
             labels[key] = f"Cluster {key} - {value:.0f}%"
         # Edit df_data and return labels
         df_data["clusters"] = df_data["clusters"].replace(labels)
         return list(labels.values())
 
-    def __interactive_scatter(self, x, y, df_data, size, is_colored, clusters, title):
-        # Add images column
-        df_data["imgs"] = self.__mol_to_2Dimage(list(df_data["mols"]))
-        df_data = df_data.drop(columns=["mols"])
+    def __interactive_scatter(self, x, y, df_data, size, is_colored, clusters, title, images, n_jobs, cache_dir, output_backend, lod, filename):
+        from bokeh.events import RangesUpdate
+        from bokeh.models import (
+            ColorBar,
+            ColumnDataSource,
+            CustomJS,
+            HoverTool,
+            TabPanel,
+            Tabs,
+        )
+        from bokeh.models.mappers import LinearColorMapper
+        from bokeh.palettes import Category10, Greys256, Inferno
+        from bokeh.plotting import figure
+        from bokeh.transform import factor_cmap, transform
+
+        # Add images column, empty images are rendered by the browser from the SMILES
+        if images == "browser":
+            df_data["imgs"] = ""
+            df_data = df_data.drop(columns=["mols"])
+        else:
+            from chemplot.depictions import depict
+
+            df_data["imgs"] = depict(df_data["mols"], (200, 130), n_jobs, cache_dir, list(df_data["smiles"]))
+            df_data = df_data.drop(columns=["mols", "smiles"])
         # Set tools
         tools = "pan, lasso_select, wheel_zoom, hover, save, reset"
 
+        # Columns used by the glyphs, the tooltips and the browser rendering of the images
+        columns = [x, y, "imgs"] + (["smiles"] if images == "browser" else [])
+        cluster_columns = columns + ["clusters"]
         if len(self.__target) == 0:
             TOOLTIPS = parameters.TOOLTIPS_NO_TARGET
         else:
             TOOLTIPS = parameters.TOOLTIPS_TARGET
+            columns = columns + ["target"]
+        clusters = clusters and "clusters" in df_data.columns
+        if clusters:
+            # Get percentages
+            self.__percentage_clusters(df_data)
 
-        # Create plot
-        p = figure(title=title, width=size, height=size, tools=tools, tooltips=TOOLTIPS)
-
-        if len(self.__target) == 0 or not (is_colored):
-            p.scatter(x=x, y=y, size=2.5, alpha=0.8, source=df_data)
-        else:
-            # Target exists
+        # Colors of the molecules
+        scatter_kwargs = {}
+        color_bar = None
+        if len(self.__target) > 0 and is_colored:
             if self.__target_type == "C":
                 index_cmap = factor_cmap("target", Category10[10], list(set(df_data["target"])))
-                p.scatter(x=x, y=y, size=2.5, alpha=0.8, line_color=index_cmap, fill_color=index_cmap, legend_group="target", source=df_data)
-                p.legend.location = "top_left"
-                p.legend.title = "Target"
+                scatter_kwargs = {"line_color": index_cmap, "fill_color": index_cmap}
             else:
                 color_mapper = LinearColorMapper(Inferno[256], low=min(df_data["target"]), high=max(df_data["target"]))
                 index_cmap = transform("target", color_mapper)
-                p.scatter(x=x, y=y, size=2.5, alpha=0.8, line_color=index_cmap, fill_color=index_cmap, source=df_data)
+                scatter_kwargs = {"line_color": index_cmap, "fill_color": index_cmap}
                 color_bar = ColorBar(color_mapper=color_mapper, location=(0, 0))
-                p.add_layout(color_bar, "right")
+
+        # Only the first level of the pyramid is embedded in the plot
+        df_all = df_data
+        if lod:
+            from chemplot.tiles import point_levels
+
+            levels, bounds = point_levels(df_all[x].values, df_all[y].values, parameters.LOD_TILE_POINTS, parameters.LOD_MAX_LEVEL, 0)
+            df_data = df_all[levels == 0]
+
+        # Create plot
+        p = figure(title=title, width=size, height=size, tools=tools, tooltips=TOOLTIPS, output_backend=output_backend)
+
+        if lod:
+            # Density of all the molecules under the first level
+            hex_size = max(bounds[1] - bounds[0], bounds[3] - bounds[2]) / parameters.LOD_HEX_BINS or 1.0
+            hex_renderer, _ = p.hexbin(df_all[x].values, df_all[y].values, size=hex_size, palette=Greys256[::-1], fill_alpha=0.3)
+
+        source = self.__column_source(df_data, columns, (x, y))
+        if len(self.__target) > 0 and is_colored and self.__target_type == "C":
+            renderer = p.scatter(x=x, y=y, size=2.5, alpha=0.8, legend_group="target", source=source, **scatter_kwargs)
+            p.legend.location = "top_left"
+            p.legend.title = "Target"
+        else:
+            renderer = p.scatter(x=x, y=y, size=2.5, alpha=0.8, source=source, **scatter_kwargs)
+        if color_bar is not None:
+            p.add_layout(color_bar, "right")
+
+        if lod:
+            from chemplot.tiles import write_tiles
+
+            # Points of the tiles of the next levels intersecting the view, loaded by the callback as the user zooms.
+            # The tiles also hold the clusters, the clusters tab loads the same tiles.
+            directory = os.path.splitext(filename)[0] + "_tiles"
+            tile_columns = columns + (["clusters"] if clusters else [])
+            keys = write_tiles(directory, self.__column_data(df_all, tile_columns, (x, y)), df_all[x].values, df_all[y].values, levels, bounds)
+            detail_source = ColumnDataSource(data={column: [] for column in tile_columns})
+            detail_renderer = p.scatter(x=x, y=y, size=2.5, alpha=0.8, source=detail_source, **scatter_kwargs)
+            p.select_one(HoverTool).renderers = [renderer, detail_renderer]
+            lod_args = {
+                "bounds": [float(bound) for bound in bounds],
+                "n_levels": int(levels.max()) + 1,
+                "available": keys,
+                "url": os.path.basename(directory),
+                "columns": tile_columns,
+            }
+            callback_args = {"x_range": p.x_range, "y_range": p.y_range, "sources": [detail_source], "groups": [None], "hex": hex_renderer}
+            p.js_on_event(RangesUpdate, CustomJS(args={**lod_args, **callback_args, "view": "plot"}, code=parameters.LOD_CALLBACK))
+
+        if images == "browser":
+            p.select_one(HoverTool).callback = CustomJS(args={"rdkit_js": parameters.RDKIT_JS}, code=parameters.DEPICTION_CALLBACK)
 
         tabs = None
-        if clusters and "clusters" in df_data.columns:
-            p_c = figure(title=title, width=size, height=size, tools=tools, tooltips=parameters.TOOLTIPS_CLUSTER)
-            # Get percentages
-            self.__percentage_clusters(df_data)
-            clusters = df_data.groupby(["clusters"])
-            for cluster, color in zip(clusters, Category10[10]):
-                p_c.scatter(
-                    x=x,
-                    y=y,
-                    size=2.5,
-                    alpha=1,
-                    line_color=color,
-                    fill_color=color,
-                    legend_label=f"{cluster[0]}",
-                    muted_color=("#717375"),
-                    muted_alpha=0.2,
-                    source=cluster[1],
-                )
+        if clusters:
+            p_c = figure(title=title, width=size, height=size, tools=tools, tooltips=parameters.TOOLTIPS_CLUSTER, output_backend=output_backend)
+            # Every cluster is listed, even without molecules in the first level of the pyramid
+            clusters = df_all.groupby(["clusters"])
+            detail_sources = []
+            for ((label,), df_cluster), color in zip(clusters, itertools.cycle(Category10[10])):
+                cluster_kwargs = {
+                    "size": 2.5,
+                    "alpha": 1,
+                    "line_color": color,
+                    "fill_color": color,
+                    "legend_label": label,
+                    "muted_color": ("#717375"),
+                    "muted_alpha": 0.2,
+                }
+                if lod:
+                    df_cluster = df_cluster[df_cluster.index.isin(df_data.index)]
+                p_c.scatter(x=x, y=y, source=self.__column_source(df_cluster, cluster_columns, (x, y)), **cluster_kwargs)
+                if lod:
+                    # Points of the cluster loaded from the tiles, in the same legend item
+                    detail_sources.append(ColumnDataSource(data={column: [] for column in tile_columns}))
+                    p_c.scatter(x=x, y=y, source=detail_sources[-1], **cluster_kwargs)
+
+            if lod:
+                callback_args = {
+                    "x_range": p_c.x_range,
+                    "y_range": p_c.y_range,
+                    "sources": detail_sources,
+                    "groups": [label for (label,), _ in clusters],
+                    "hex": None,
+                }
+                p_c.js_on_event(RangesUpdate, CustomJS(args={**lod_args, **callback_args, "view": "clusters"}, code=parameters.LOD_CALLBACK))
 
             p_c.legend.location = "top_left"
             p_c.legend.title = "Clusters"
@@ -691,19 +1637,25 @@ class Plotter(object):
             p_c.xaxis.major_label_text_font_size = "0pt"
             p_c.yaxis.major_label_text_font_size = "0pt"
 
+            if images == "browser":
+                p_c.select_one(HoverTool).callback = CustomJS(args={"rdkit_js": parameters.RDKIT_JS}, code=parameters.DEPICTION_CALLBACK)
+
             tab1 = TabPanel(child=p, title="Plot")
             tab2 = TabPanel(child=p_c, title="Clusters")
             tabs = Tabs(tabs=[tab1, tab2])
 
         return p, tabs
 
-    def __interactive_hex(self, x, y, df_data, size, title):
+    def __interactive_hex(self, x, y, df_data, size, title, output_backend):
+        from bokeh.models import HoverTool
+        from bokeh.plotting import figure
+
         # Hex Plot
-        df_data = df_data.drop(columns=["mols"])
+        df_data = df_data.drop(columns=["mols", "smiles"])
 
         tools = "pan, wheel_zoom, save, reset"
 
-        p = figure(title=title, width=size, height=size, match_aspect=True, tools=tools)
+        p = figure(title=title, width=size, height=size, match_aspect=True, tools=tools, output_backend=output_backend)
         p.background_fill_color = "#440154"
         p.grid.visible = False
 
@@ -723,25 +1675,27 @@ class Plotter(object):
 
         return p
 
-    def __mol_to_2Dimage(self, list_mols):
-        # Create molecule images
-        images_mol = []
-        for mol in list_mols:
-            try:
-                png = Draw.MolToImage(mol, size=(200, 130))
-                out = BytesIO()
-                png.save(out, format="jpeg")
-                png = out.getvalue()
-                url = "data:image/jpeg;base64," + base64.b64encode(png).decode("utf-8")
-            except:
-                url = None
+    def __column_source(self, df_data, columns, coordinates):
+        # Data source of the given columns only (without the dataframe index)
+        from bokeh.models import ColumnDataSource
 
-            images_mol.append(url)
+        return ColumnDataSource(data=self.__column_data(df_data, columns, coordinates))
 
-        return images_mol
+    def __column_data(self, df_data, columns, coordinates):
+        # Arrays of the given columns, the coordinates are sent as float32 arrays. Other values (e.g. the target
+        # shown by the tooltips and the colour bar) keep their precision.
+        data = {}
+        for column in columns:
+            if column in coordinates:
+                data[column] = df_data[column].to_numpy(dtype=np.float32)
+            else:
+                data[column] = df_data[column].to_numpy()
+        return data
 
     @calltracker
     def __open_plot(self, p):
+        from bokeh.io import show
+
         show(p)
 
     def get_target(self):
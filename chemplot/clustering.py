@@ -0,0 +1,202 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# Butina clustering of bit-packed fingerprints by Tanimoto distance and selection of the number of clusters
+#
+# License: BSD 3 clause
+import numpy as np
+import scipy.sparse as sp
+
+from chemplot import parameters
+from chemplot.neighbors import popcount
+from chemplot.utils import effective_n_jobs, map_chunks
+
+
+def butina(packed_fingerprints, threshold=0.35, n_jobs=1, block_size=1024):
+    """
+    Clusters bit-packed fingerprints with the Butina (sphere exclusion) algorithm:
+    molecules are taken by decreasing number of neighbours within the Tanimoto distance
+    threshold, each molecule not yet clustered becomes the centroid of a cluster made
+    of its neighbours not yet clustered.
+
+    :param packed_fingerprints: Bit-packed fingerprints, one row per molecule
+    :param threshold: Largest Tanimoto distance between a centroid and the molecules of its cluster
+    :param n_jobs: Number of worker processes comparing the fingerprints. -1 uses all the available CPUs.
+    :param block_size: Number of molecules compared at once
+    :type packed_fingerprints: numpy.ndarray
+    :type threshold: float
+    :type n_jobs: int
+    :type block_size: int
+    :returns: The cluster of each molecule, numbered in the order their centroids are picked
+    :rtype: numpy.ndarray
+    """
+    rows, cols, _ = neighbor_pairs(packed_fingerprints, threshold, n_jobs, block_size)
+    return _butina_labels(len(packed_fingerprints), rows, cols)
+
+
+def butina_sweep(packed_fingerprints, thresholds, n_jobs=1, block_size=1024):
+    """
+    Clusters bit-packed fingerprints with the Butina algorithm for several thresholds.
+    The fingerprints are compared once for the largest threshold, the clusterings of
+    the thresholds are then computed in parallel processes.
+
+    :param packed_fingerprints: Bit-packed fingerprints, one row per molecule
+    :param thresholds: Tanimoto distance thresholds
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param block_size: Number of molecules compared at once
+    :type packed_fingerprints: numpy.ndarray
+    :type thresholds: list
+    :type n_jobs: int
+    :type block_size: int
+    :returns: The clusters of the molecules for each threshold
+    :rtype: dict
+    """
+    thresholds = list(thresholds)
+    pairs = neighbor_pairs(packed_fingerprints, max(thresholds), n_jobs, block_size)
+    labels = map_chunks(_butina_chunk, thresholds, n_jobs, chunk_size=1, args=(len(packed_fingerprints),) + pairs)
+    return dict(zip(thresholds, labels))
+
+
+def select_n_clusters(data, k_range, algorithm="kmeans", score="silhouette", n_jobs=1, sample_size=parameters.CLUSTER_SCORE_SAMPLE, **kwargs):
+    """
+    Selects the number of clusters of k-means with the best score. The candidates are clustered
+    and scored in parallel processes. The silhouette is computed on a random sample of the molecules,
+    the same for every candidate, and the Calinski-Harabasz index on all of them, so that the pairwise
+    distances of all the molecules are never computed.
+
+    :param data: Coordinates of the molecules, one row per molecule
+    :param k_range: Candidate numbers of clusters. Candidates smaller than 2 or not smaller than the number of molecules are skipped.
+    :param algorithm: kmeans (sklearn.cluster.KMeans) or minibatch (sklearn.cluster.MiniBatchKMeans)
+    :param score: silhouette or calinski_harabasz, the larger the better
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param sample_size: Number of molecules the silhouette is computed on
+    :param kwargs: Other keyword arguments are passed down to the sklearn.cluster estimator
+    :type data: numpy.ndarray
+    :type k_range: range
+    :type algorithm: string
+    :type score: string
+    :type n_jobs: int
+    :type sample_size: int
+    :type kwargs: key, value mappings
+    :returns: The selected number of clusters and the score of each candidate (NaN if it could not be scored)
+    :rtype: tuple
+    """
+    ks = [k for k in k_range if 2 <= k < data.shape[0]]
+    if len(ks) == 0:
+        raise Exception(f"No number of clusters in {k_range} is between 2 and the number of molecules")
+
+    sample = None
+    if score == "silhouette" and data.shape[0] > sample_size:
+        random_state = kwargs.get("random_state")
+        generator = random_state if isinstance(random_state, np.random.RandomState) else np.random.RandomState(random_state)
+        sample = np.sort(generator.choice(data.shape[0], sample_size, replace=False))
+    scores = map_chunks(_scores_chunk, ks, n_jobs, chunk_size=1, args=(data, algorithm, score, sample, kwargs))
+    scores = dict(zip(ks, scores))
+    if np.isnan(list(scores.values())).all():
+        raise Exception("None of the numbers of clusters could be scored")
+    return ks[int(np.nanargmax(list(scores.values())))], scores
+
+
+def neighbor_pairs(packed_fingerprints, threshold, n_jobs=1, block_size=1024):
+    """
+    Finds the pairs of molecules within a Tanimoto distance threshold. The fingerprints
+    are compared by blocks, so that memory is bounded by the block size and the number
+    of pairs found.
+
+    :param packed_fingerprints: Bit-packed fingerprints, one row per molecule
+    :param threshold: Largest Tanimoto distance between the molecules of a pair
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param block_size: Number of molecules compared at once
+    :type packed_fingerprints: numpy.ndarray
+    :type threshold: float
+    :type n_jobs: int
+    :type block_size: int
+    :returns: The first and second molecule (first < second) and the Tanimoto distance of each pair, sorted by molecules
+    :rtype: tuple
+    """
+    packed_fingerprints = np.ascontiguousarray(packed_fingerprints, dtype=np.uint8)
+    starts = list(range(0, len(packed_fingerprints), block_size))
+    # One group of blocks per worker, so that the fingerprints are only sent once to each of them. A block is only
+    # compared with the molecules that follow it, the blocks are dealt in turn so that the groups get as many comparisons.
+    n_groups = min(effective_n_jobs(n_jobs), len(starts))
+    groups = [starts[k::n_groups] for k in range(n_groups)]
+    chunks = map_chunks(_pairs_chunk, groups, n_jobs, chunk_size=1, args=(packed_fingerprints, threshold, block_size))
+    if len(chunks) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    rows, cols, distances = (np.concatenate(values) for values in zip(*chunks))
+    order = np.lexsort((cols, rows))
+    return rows[order], cols[order], distances[order]
+
+
+def _pairs_chunk(groups, packed_fingerprints, threshold, block_size):
+    # Compare the blocks of molecules starting at the starts of the groups with the molecules that follow them.
+    # The common bits of two blocks are counted by a product of their unpacked bits.
+    counts = popcount(packed_fingerprints).astype(np.float64)
+    n_molecules = len(packed_fingerprints)
+    rows, cols, distances = [], [], []
+    for start in (start for starts in groups for start in starts):
+        stop = min(start + block_size, n_molecules)
+        queries = np.unpackbits(packed_fingerprints[start:stop], axis=1).astype(np.float32)
+        for reference_start in range(start, n_molecules, block_size):
+            reference_stop = min(reference_start + block_size, n_molecules)
+            references = np.unpackbits(packed_fingerprints[reference_start:reference_stop], axis=1).astype(np.float32)
+            # Counts are exact in float32, the distances are compared to the threshold in double precision
+            intersection = (queries @ references.T).astype(np.float64)
+            union = counts[start:stop, np.newaxis] + counts[np.newaxis, reference_start:reference_stop] - intersection
+            with np.errstate(divide="ignore", invalid="ignore"):
+                block_distances = np.where(union > 0, 1.0 - intersection / union, 0.0)
+            block_rows, block_cols = np.nonzero(block_distances <= threshold)
+            block_rows += start
+            block_cols += reference_start
+            upper = block_cols > block_rows
+            rows.append(block_rows[upper])
+            cols.append(block_cols[upper])
+            distances.append(block_distances[block_rows[upper] - start, block_cols[upper] - reference_start].astype(np.float32))
+    return [(np.concatenate(rows), np.concatenate(cols), np.concatenate(distances))]
+
+
+def _scores_chunk(ks, data, algorithm, score, sample, kwargs):
+    # Cluster the molecules for each number of clusters and score the clustering
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import calinski_harabasz_score, silhouette_score
+
+    scores = []
+    for k in ks:
+        cluster = MiniBatchKMeans(k, **kwargs) if algorithm == "minibatch" else KMeans(k, **kwargs)
+        labels = cluster.fit_predict(data)
+        n_labels = len(np.unique(labels if sample is None else labels[sample]))
+        n_scored = data.shape[0] if sample is None else len(sample)
+        # Both scores need at least 2 clusters, the silhouette at least one cluster with more than one molecule
+        if n_labels < 2 or (score == "silhouette" and n_labels == n_scored):
+            scores.append(np.nan)
+        elif score == "silhouette":
+            scores.append(silhouette_score(data, labels) if sample is None else silhouette_score(data[sample], labels[sample]))
+        else:
+            scores.append(calinski_harabasz_score(data, labels))
+    return scores
+
+
+def _butina_chunk(thresholds, n_molecules, rows, cols, distances):
+    # Cluster the molecules for each threshold, from the pairs found for a larger one
+    labels = []
+    for threshold in thresholds:
+        within = distances <= threshold
+        labels.append(_butina_labels(n_molecules, rows[within], cols[within]))
+    return labels
+
+
+def _butina_labels(n_molecules, rows, cols):
+    # Neighbours of each molecule in both directions of the pairs
+    edges = np.ones(2 * len(rows), dtype=np.int8)
+    graph = sp.csr_matrix((edges, (np.concatenate([rows, cols]), np.concatenate([cols, rows]))), shape=(n_molecules, n_molecules))
+    # Centroids by decreasing number of neighbours, ties by decreasing index as in rdkit.ML.Cluster.Butina
+    order = np.lexsort((-np.arange(n_molecules), -np.diff(graph.indptr)))
+
+    labels = np.full(n_molecules, -1, dtype=np.int64)
+    n_clusters = 0
+    for centroid in order:
+        if labels[centroid] >= 0:
+            continue
+        neighbors = graph.indices[graph.indptr[centroid] : graph.indptr[centroid + 1]]
+        labels[neighbors[labels[neighbors] < 0]] = n_clusters
+        labels[centroid] = n_clusters
+        n_clusters += 1
+    return labels
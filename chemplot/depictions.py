@@ -0,0 +1,101 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# Rendering of the 2D depictions of molecules shown by the tooltips
+#
+# License: BSD 3 clause
+import base64
+from io import BytesIO
+
+import rdkit
+from rdkit import Chem
+
+from chemplot import parameters
+from chemplot.cache import MoleculeCache
+from chemplot.utils import map_chunks
+
+# Depictions rendered in this session, as data URLs (None if the molecule could not be drawn), by canonical SMILES and image size
+_depictions = {}
+
+
+def depict(mols, size=(200, 130), n_jobs=1, cache_dir=None, smiles=None):
+    """
+    Renders the 2D depictions of molecules as JPEG data URLs. Each molecule is rendered once:
+    depictions are cached in memory by canonical SMILES and image size, and optionally on disk,
+    so that duplicate molecules and repeated calls reuse them. The molecules not cached are
+    rendered in parallel processes.
+
+    :param mols: Molecules to render
+    :param size: Width and height of the images in pixels
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param cache_dir: Directory of the on-disk cache of depictions. None disables the cache.
+    :param smiles: Canonical SMILES of the molecules, computed from them if None
+    :type mols: list
+    :type size: tuple
+    :type n_jobs: int
+    :type cache_dir: string
+    :type smiles: list
+    :returns: The data URL of the image of each molecule, None for the molecules that could not be drawn
+    :rtype: list
+    """
+    mols = list(mols)
+    size = tuple(size)
+    if smiles is None:
+        smiles = [Chem.MolToSmiles(mol) for mol in mols]
+
+    # Depictions rendered in this session, and the first molecule of each canonical SMILES still to render
+    urls = {}
+    missing = {}
+    for mol, key in zip(mols, smiles):
+        if key in urls or key in missing:
+            continue
+        if (key, size) in _depictions:
+            urls[key] = _depictions[(key, size)]
+        else:
+            missing[key] = mol
+
+    if len(missing) > 0:
+        cache = None
+        if cache_dir is not None:
+            cache = MoleculeCache(cache_dir, "depiction", f"rdkit={rdkit.__version__};size={size[0]}x{size[1]};format=jpeg")
+            for key, jpeg in cache.get(list(missing)).items():
+                urls[key] = _store(key, size, jpeg)
+                del missing[key]
+
+        images = map_chunks(_depict_chunk, list(missing.values()), n_jobs, args=(size,))
+        for key, jpeg in zip(missing, images):
+            urls[key] = _store(key, size, jpeg)
+        if cache is not None:
+            cache.put({key: jpeg for key, jpeg in zip(missing, images) if jpeg is not None})
+
+    return [urls[key] for key in smiles]
+
+
+def clear_depictions():
+    """
+    Empties the in-memory cache of depictions.
+    """
+    _depictions.clear()
+
+
+def _store(key, size, jpeg):
+    # Keep the data URL of the depiction, forgetting the oldest ones beyond the size of the cache
+    url = None if jpeg is None else "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("utf-8")
+    _depictions[(key, size)] = url
+    while len(_depictions) > parameters.DEPICTION_CACHE_SIZE:
+        del _depictions[next(iter(_depictions))]
+    return url
+
+
+def _depict_chunk(mols, size):
+    # JPEG bytes of the depiction of each molecule, None if it could not be drawn
+    from rdkit.Chem import Draw
+
+    images = []
+    for mol in mols:
+        try:
+            image = Draw.MolToImage(mol, size=size)
+            out = BytesIO()
+            image.save(out, format="jpeg")
+            images.append(out.getvalue())
+        except Exception:
+            images.append(None)
+    return images
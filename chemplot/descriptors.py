@@ -4,94 +4,144 @@
 # License: BSD 3 clause
 from __future__ import print_function
 
-import math
+import functools
+import signal
+import threading
+import time
+import warnings
 
-import mordred
 import numpy as np
 import pandas as pd
-from mordred import Calculator, descriptors  # Dont remove these imports
+import rdkit
+import scipy.sparse as sp
 from rdkit import Chem
 from rdkit.Chem import AllChem
-from sklearn.feature_selection import SelectFromModel
-from sklearn.linear_model import Lasso, LogisticRegression
-from sklearn.preprocessing import StandardScaler
 
+from chemplot.cache import MoleculeCache
+from chemplot.molecules import (
+    _ENCODING_FUNCTIONS,
+    MoleculeSet,
+    _canonical_chunk,
+    _merge_chunks,
+    _picklable_parser,
+    _prepare_mol,
+)
+from chemplot.utils import map_chunks
 
-def get_mordred_descriptors(smiles_list, target_list):
+
+def get_mordred_descriptors(smiles_list, target_list, n_jobs=1, chunk_size=None, timeout=None, cache_dir=None, dtype=np.float64, dedupe=False):
     """
     Calculates the Mordred descriptors for given smiles list
 
-    :param smiles_list: List of smiles
+    :param smiles_list: List of smiles or MoleculeSet
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param timeout: Seconds after which the descriptor calculation of a molecule is abandoned
+    :param cache_dir: Directory of the on-disk cache of descriptors. None disables the cache.
+    :param dtype: Floating point type of the descriptors (numpy.float64 or numpy.float32)
+    :param dedupe: If True the descriptors of identical molecules are computed once
     :type smiles_list: list
+    :type n_jobs: int
+    :type chunk_size: int
+    :type timeout: float
+    :type cache_dir: string
+    :type dtype: type
+    :type dedupe: boolean
     :returns: The calculated descriptors list for the given smiles
     :rtype: Dataframe
     """
 
-    return generate_mordred_descriptors(smiles_list, target_list, Chem.MolFromSmiles, "SMILES")
+    return generate_mordred_descriptors(smiles_list, target_list, Chem.MolFromSmiles, "SMILES", n_jobs, chunk_size, timeout, cache_dir, dtype, dedupe)
 
 
-def get_mordred_descriptors_from_inchi(inchi_list, target_list):
+def get_mordred_descriptors_from_inchi(
+    inchi_list, target_list, n_jobs=1, chunk_size=None, timeout=None, cache_dir=None, dtype=np.float64, dedupe=False
+):
     """
     Calculates the Mordred descriptors for given InChi list
 
-    :param inchi_list: List of InChi
+    :param inchi_list: List of InChi or MoleculeSet
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param timeout: Seconds after which the descriptor calculation of a molecule is abandoned
+    :param cache_dir: Directory of the on-disk cache of descriptors. None disables the cache.
+    :param dtype: Floating point type of the descriptors (numpy.float64 or numpy.float32)
+    :param dedupe: If True the descriptors of identical molecules are computed once
     :type inchi_list: list
+    :type n_jobs: int
+    :type chunk_size: int
+    :type timeout: float
+    :type cache_dir: string
+    :type dtype: type
+    :type dedupe: boolean
     :returns: The calculated descriptors list for the given smiles
     :rtype: Dataframe
     """
 
-    return generate_mordred_descriptors(inchi_list, target_list, Chem.MolFromInchi, "InChi")
-
-
-def generate_mordred_descriptors(encoding_list, target_list, encoding_function, encoding_name):
+    return generate_mordred_descriptors(inchi_list, target_list, Chem.MolFromInchi, "InChi", n_jobs, chunk_size, timeout, cache_dir, dtype, dedupe)
+
+
+def generate_mordred_descriptors(
+    encoding_list,
+    target_list,
+    encoding_function,
+    encoding_name,
+    n_jobs=1,
+    chunk_size=None,
+    timeout=None,
+    cache_dir=None,
+    dtype=np.float64,
+    dedupe=False,
+):
     """
     Calculates the Mordred descriptors for list of molecules encodings
 
-    :param smiles_list: List of molecules encodings
+    :param smiles_list: List of molecules encodings or MoleculeSet
+    :param n_jobs: Number of worker processes among which the encodings are split in chunks.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param timeout: Seconds after which the descriptor calculation of a molecule is abandoned. Such molecules are handled as
+        molecules for which not all descriptors can be computed. Only supported on platforms providing SIGALRM and
+        in the main thread of the process, a warning is emitted otherwise. The calculation is abandoned once it
+        returns to Python code: a molecule stuck in a single call to native code (RDKit, numpy) is not interrupted.
+    :param cache_dir: Directory of the on-disk cache of descriptors, keyed by canonical SMILES. None disables the cache.
+    :param dtype: Floating point type of the descriptors matrix (numpy.float64 or numpy.float32)
+    :param dedupe: If True the descriptors of molecules with the same canonical SMILES are computed once and shared.
     :type smiles_list: list
+    :type n_jobs: int
+    :type chunk_size: int
+    :type timeout: float
+    :type cache_dir: string
+    :type dtype: type
+    :type dedupe: boolean
     :returns: The calculated descriptors list for the given molecules encodings
     :rtype: Dataframe
     """
 
-    calc = mordred.Calculator()
-
-    calc.register(mordred.AtomCount)  # 16
-    calc.register(mordred.RingCount)  # 139
-    calc.register(mordred.BondCount)  # 9
-    calc.register(mordred.HydrogenBond)  # 2
-    calc.register(mordred.CarbonTypes)  # 10
-    calc.register(mordred.SLogP)  # 2
-    calc.register(mordred.Constitutional)  # 16
-    calc.register(mordred.TopoPSA)  # 2
-    calc.register(mordred.Weight)  # 2
-    calc.register(mordred.Polarizability)  # 2
-    calc.register(mordred.McGowanVolume)  # 1
-
     name_list = []
-    for desc_name in calc.descriptors:
+    for desc_name in _mordred_calculator().descriptors:
         name_list.append(str(desc_name))
 
-    mols = []
-    descriptors_list = []
-    erroneous_encodings = []
-    encodings_none_descriptors = []
-    for encoding in encoding_list:
-        mol = encoding_function(encoding)
-        if mol is None:
-            descriptors_list.append([None] * len(name_list))
-            erroneous_encodings.append(encoding)
-        else:
-            mol = Chem.AddHs(mol)
-            calculated_descriptors = calc(mol)
-            for i in range(len(calculated_descriptors._values)):
-                if math.isnan(calculated_descriptors._values[i]):
-                    calculated_descriptors._values = [None] * len(name_list)
-                    encodings_none_descriptors.append(encoding)
-                    break
-                if i == len(calculated_descriptors._values) - 1:
-                    mols.append(mol)
-            descriptors_list.append(calculated_descriptors._values)
-
+    parser = _picklable_parser(encoding_function, encoding_name)
+    cache = None
+    if cache_dir is not None:
+        cache = MoleculeCache(cache_dir, "mordred", f"rdkit={rdkit.__version__};" + ",".join(name_list))
+    results, _ = _map_molecules(_mordred_chunk, encoding_list, parser, (timeout,), n_jobs, chunk_size, cache, _float_bytes, _float_list, dedupe)
+    if isinstance(encoding_list, MoleculeSet):
+        encoding_name = encoding_list.encoding_name
+        encoding_list = encoding_list.encodings
+    encoding_list = list(encoding_list)
+
+    # Fill a matrix with one row per encoding, rows of erroneous encodings and timed out calculations are left NaN
+    descriptors_matrix = np.full((len(encoding_list), len(name_list)), np.nan, dtype=dtype)
+    parsed = np.zeros(len(encoding_list), dtype=bool)
+    for i, (mol, calculated_values) in enumerate(results):
+        if mol is not None:
+            parsed[i] = True
+            if calculated_values is not None:
+                descriptors_matrix[i] = calculated_values
+    complete = parsed & ~np.isnan(descriptors_matrix).any(axis=1)
+
+    erroneous_encodings = [encoding_list[i] for i in np.flatnonzero(~parsed)]
     if len(erroneous_encodings) > 0:
         print(
             "The following erroneous {} have been found in the data:\n{}.\nThe erroneous {} will be removed from the data.".format(
@@ -99,6 +149,7 @@ def generate_mordred_descriptors(encoding_list, target_list, encoding_function,
             )
         )
 
+    encodings_none_descriptors = [encoding_list[i] for i in np.flatnonzero(parsed & ~complete)]
     if len(encodings_none_descriptors) > 0:
         print(
             "For the following {} not all descriptors can be computed:\n{}.\nThese {} will be removed from the data.".format(
@@ -106,16 +157,16 @@ def generate_mordred_descriptors(encoding_list, target_list, encoding_function,
             )
         )
 
-    df_descriptors = pd.DataFrame(descriptors_list, columns=name_list)
-    df_descriptors = df_descriptors.select_dtypes(exclude=["object"])
-
     # Remove erroneous data
-    if not isinstance(target_list, list):
-        target_list = target_list.values
-    df_descriptors = df_descriptors.assign(target=target_list)
-    df_descriptors = df_descriptors.dropna(how="any")
-    target_list = df_descriptors["target"].to_list()
-    df_descriptors = df_descriptors.drop(columns=["target"])
+    valid = complete
+    if len(target_list) > 0:
+        if not isinstance(target_list, list):
+            target_list = target_list.values
+        valid = complete & pd.notna(np.asarray(target_list, dtype=object))
+        target_list = [target for target, is_valid in zip(target_list, valid) if is_valid]
+
+    mols = [mol for (mol, _), is_valid in zip(results, valid) if is_valid]
+    df_descriptors = pd.DataFrame(data=descriptors_matrix[valid], index=np.flatnonzero(valid), columns=name_list, copy=False)
 
     return mols, df_descriptors, target_list
 
@@ -137,6 +188,9 @@ def select_descriptors_lasso(df_descriptors, target_list, R_select=0.05, C_selec
     :returns: The selected descriptors
     :rtype: Dataframe
     """
+    from sklearn.feature_selection import SelectFromModel
+    from sklearn.linear_model import Lasso, LogisticRegression
+    from sklearn.preprocessing import StandardScaler
 
     df_descriptors_scaled = StandardScaler().fit_transform(df_descriptors)
 
@@ -160,75 +214,133 @@ def select_descriptors_lasso(df_descriptors, target_list, R_select=0.05, C_selec
     return selected_data, target_list
 
 
-def get_ecfp(smiles_list, target_list, radius=2, nBits=2048):
+def get_ecfp(smiles_list, target_list, radius=2, nBits=2048, n_jobs=1, sparse=False, chunk_size=None, cache_dir=None, dedupe=False, columns=None):
     """
     Calculates the ECFP fingerprint for given SMILES list
 
-    :param smiles_list: List of SMILES
+    :param smiles_list: List of SMILES or MoleculeSet
     :param radius: The ECPF fingerprints radius.
     :param nBits: The number of bits of the fingerprint vector.
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param sparse: If True the fingerprints are returned as a sparse DataFrame.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param cache_dir: Directory of the on-disk cache of fingerprints. None disables the cache.
+    :param dedupe: If True the fingerprints of identical molecules are computed once
+    :param columns: Bits to keep, e.g. the columns of fingerprints computed before. By default the bits which are not constant are kept.
     :type radius: int
     :type smiles_list: list
     :type nBits: int
+    :type n_jobs: int
+    :type sparse: boolean
+    :type chunk_size: int
+    :type cache_dir: string
+    :type dedupe: boolean
+    :type columns: list
     :returns: The calculated ECPF fingerprints for the given SMILES
     :rtype: Dataframe
     """
 
-    return generate_ecfp(smiles_list, Chem.MolFromSmiles, "SMILES", target_list, radius, nBits)
+    return generate_ecfp(
+        smiles_list, Chem.MolFromSmiles, "SMILES", target_list, radius, nBits, n_jobs, sparse, chunk_size, cache_dir, dedupe, columns
+    )
 
 
-def get_ecfp_from_inchi(inchi_list, target_list, radius=2, nBits=2048):
+def get_ecfp_from_inchi(
+    inchi_list, target_list, radius=2, nBits=2048, n_jobs=1, sparse=False, chunk_size=None, cache_dir=None, dedupe=False, columns=None
+):
     """
     Calculates the ECFP fingerprint for given InChi list
 
-    :param inchi_list: List of InChi
+    :param inchi_list: List of InChi or MoleculeSet
     :param radius: The ECPF fingerprints radius.
     :param nBits: The number of bits of the fingerprint vector.
+    :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+    :param sparse: If True the fingerprints are returned as a sparse DataFrame.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param cache_dir: Directory of the on-disk cache of fingerprints. None disables the cache.
+    :param dedupe: If True the fingerprints of identical molecules are computed once
+    :param columns: Bits to keep, e.g. the columns of fingerprints computed before. By default the bits which are not constant are kept.
     :type inchi_list: list
     :type radius: int
     :type nBits: int
+    :type n_jobs: int
+    :type sparse: boolean
+    :type chunk_size: int
+    :type cache_dir: string
+    :type dedupe: boolean
+    :type columns: list
     :returns: The calculated ECPF fingerprints for the given InChi
     :rtype: Dataframe
     """
 
-    return generate_ecfp(inchi_list, Chem.MolFromInchi, "InChi", target_list, radius, nBits)
-
-
-def generate_ecfp(encoding_list, encoding_function, encoding_name, target_list, radius=2, nBits=2048):
+    return generate_ecfp(inchi_list, Chem.MolFromInchi, "InChi", target_list, radius, nBits, n_jobs, sparse, chunk_size, cache_dir, dedupe, columns)
+
+
+def generate_ecfp(
+    encoding_list,
+    encoding_function,
+    encoding_name,
+    target_list,
+    radius=2,
+    nBits=2048,
+    n_jobs=1,
+    sparse=False,
+    chunk_size=None,
+    cache_dir=None,
+    dedupe=False,
+    columns=None,
+):
     """
     Calculates the ECFP fingerprint for given list of molecules encodings
 
-    :param encoding_list: List of molecules encodings
+    :param encoding_list: List of molecules encodings or MoleculeSet
     :param encoding_function: Function used to extract the molecules from the encodings
     :param radius: The ECPF fingerprints radius.
     :param nBits: The number of bits of the fingerprint vector.
+    :param n_jobs: Number of worker processes among which the encodings are split in chunks.
+    :param sparse: If True the DataFrame is backed by a CSR matrix instead of a dense bit matrix.
+    :param chunk_size: Number of molecules sent to a worker at once
+    :param cache_dir: Directory of the on-disk cache of fingerprints, keyed by canonical SMILES. None disables the cache.
+    :param dedupe: If True the fingerprints of molecules with the same canonical SMILES are computed once and shared.
+    :param columns: Bits to keep, e.g. the columns of fingerprints computed before. By default the bits which are not constant are kept.
     :type encoding_list: list
     :type encoding_function: fun
     :type radius: int
     :type nBits: int
-    :returns: The calculated ECPF fingerprints for the given molecules encodings
+    :type n_jobs: int
+    :type sparse: boolean
+    :type chunk_size: int
+    :type cache_dir: string
+    :type dedupe: boolean
+    :type columns: list
+    :returns: The calculated ECPF fingerprints for the given molecules encodings. The seconds spent in each stage
+        (parse, AddHs, fingerprint, filter) are stored in the "timings" entry of the DataFrame attrs.
     :rtype: Dataframe
     """
 
-    # Generate ECFP fingerprints
-    mols = []
-    ecfp_fingerprints = []
+    # Generate ECFP fingerprints packed 8 bits per byte, one row per molecule
     erroneous_encodings = []
-    for encoding in encoding_list:
-        mol = encoding_function(encoding)
+    parser = _picklable_parser(encoding_function, encoding_name)
+    cache = None
+    if cache_dir is not None:
+        cache = MoleculeCache(cache_dir, "ecfp", f"rdkit={rdkit.__version__};maxPath={radius};fpSize={nBits}")
+    from_bytes = functools.partial(np.frombuffer, dtype=np.uint8)
+    results, timings = _map_molecules(
+        _ecfp_chunk, encoding_list, parser, (radius, nBits), n_jobs, chunk_size, cache, np.ndarray.tobytes, from_bytes, dedupe
+    )
+    start = time.perf_counter()
+    if isinstance(encoding_list, MoleculeSet):
+        encoding_name = encoding_list.encoding_name
+        encoding_list = encoding_list.encodings
+    encoding_list = list(encoding_list)
+    packed_fingerprints = np.zeros((len(encoding_list), (nBits + 7) // 8), dtype=np.uint8)
+    valid = np.zeros(len(encoding_list), dtype=bool)
+    for i, (mol, packed_bits) in enumerate(results):
         if mol is None:
-            ecfp_fingerprints.append([None] * nBits)
-            erroneous_encodings.append(encoding)
+            erroneous_encodings.append(encoding_list[i])
         else:
-            mol = Chem.AddHs(mol)
-            mols.append(mol)
-            list_bits_fingerprint = []
-            fpgen = AllChem.GetRDKitFPGenerator(maxPath=radius, fpSize=nBits)
-            list_bits_fingerprint[:0] = fpgen.GetFingerprint(mol)
-            ecfp_fingerprints.append(list_bits_fingerprint)
-
-    # Create dataframe of fingerprints
-    df_ecfp_fingerprints = pd.DataFrame(data=ecfp_fingerprints, index=encoding_list)
+            packed_fingerprints[i] = packed_bits
+            valid[i] = True
 
     # Remove erroneous data
     if len(erroneous_encodings) > 0:
@@ -241,16 +353,207 @@ def generate_ecfp(encoding_list, encoding_function, encoding_name, target_list,
     if len(target_list) > 0:
         if not isinstance(target_list, list):
             target_list = target_list.values
-        df_ecfp_fingerprints = df_ecfp_fingerprints.assign(target=target_list)
+        valid &= pd.notna(np.asarray(target_list, dtype=object))
+        target_list = [target for target, is_valid in zip(target_list, valid) if is_valid]
 
-    df_ecfp_fingerprints = df_ecfp_fingerprints.dropna(how="any")
-
-    if len(target_list) > 0:
-        target_list = df_ecfp_fingerprints["target"].to_list()
-        df_ecfp_fingerprints = df_ecfp_fingerprints.drop(columns=["target"])
+    mols = [mol for (mol, _), is_valid in zip(results, valid) if is_valid]
+    packed_fingerprints = packed_fingerprints[valid]
 
     # Remove bit columns with no variablity (all "0" or all "1")
-    df_ecfp_fingerprints = df_ecfp_fingerprints.loc[:, (df_ecfp_fingerprints != 0).any(axis=0)]
-    df_ecfp_fingerprints = df_ecfp_fingerprints.loc[:, (df_ecfp_fingerprints != 1).any(axis=0)]
+    if columns is None:
+        bit_counts = _count_bits(packed_fingerprints, nBits)
+        selected_bits = np.flatnonzero((bit_counts > 0) & (bit_counts < len(packed_fingerprints)))
+    else:
+        selected_bits = np.asarray(columns, dtype=np.int64)
+    ecfp_fingerprints = _unpack_bits(packed_fingerprints, nBits, selected_bits, sparse)
+
+    # Create dataframe of fingerprints on top of the bit matrix
+    index = pd.Index([encoding for encoding, is_valid in zip(encoding_list, valid) if is_valid], dtype=object)
+    if sparse:
+        df_ecfp_fingerprints = pd.DataFrame.sparse.from_spmatrix(ecfp_fingerprints, index=index, columns=selected_bits)
+    else:
+        df_ecfp_fingerprints = pd.DataFrame(data=ecfp_fingerprints, index=index, columns=selected_bits, copy=False)
+    timings["filter"] = time.perf_counter() - start
+    df_ecfp_fingerprints.attrs["timings"] = timings
 
     return mols, df_ecfp_fingerprints, target_list
+
+
+def _mordred_calculator():
+    # Calculator with the descriptors modules used by ChemPlot. mordred is imported on first use because it is slow to import.
+    import mordred
+    from mordred import Calculator, descriptors  # Dont remove these imports
+
+    calc = mordred.Calculator()
+
+    calc.register(mordred.AtomCount)  # 16
+    calc.register(mordred.RingCount)  # 139
+    calc.register(mordred.BondCount)  # 9
+    calc.register(mordred.HydrogenBond)  # 2
+    calc.register(mordred.CarbonTypes)  # 10
+    calc.register(mordred.SLogP)  # 2
+    calc.register(mordred.Constitutional)  # 16
+    calc.register(mordred.TopoPSA)  # 2
+    calc.register(mordred.Weight)  # 2
+    calc.register(mordred.Polarizability)  # 2
+    calc.register(mordred.McGowanVolume)  # 1
+
+    return calc
+
+
+def _map_molecules(chunk_function, encoding_list, parser, args, n_jobs, chunk_size, cache=None, to_bytes=None, from_bytes=None, dedupe=False):
+    # Map chunk_function over the encodings (or the molecules of a MoleculeSet), returning a (mol, value) pair per encoding
+    # and the seconds spent in each stage. With a cache only the molecules missing from it are computed, with dedupe each
+    # structure (canonical SMILES) is computed once and its value is shared by all the encodings of the structure.
+    if isinstance(encoding_list, MoleculeSet):
+        parsed = list(zip(encoding_list.mols, encoding_list.canonical_smiles))
+        timings = {}
+    elif cache is None and not dedupe:
+        return _merge_chunks(map_chunks(chunk_function, encoding_list, n_jobs, chunk_size, args=(parser,) + args, concatenate=False))
+    else:
+        parsed, timings = _merge_chunks(map_chunks(_canonical_chunk, encoding_list, n_jobs, chunk_size, args=(parser,), concatenate=False))
+
+    rows = {} if cache is None else cache.get([key for mol, key in parsed if mol is not None])
+    missing = [i for i, (mol, key) in enumerate(parsed) if mol is not None and key not in rows]
+    if dedupe:
+        # Keep the first encoding of each structure
+        missing = sorted({parsed[i][1]: i for i in reversed(missing)}.values())
+    computed, computed_timings = _merge_chunks(
+        map_chunks(chunk_function, [parsed[i][0] for i in missing], n_jobs, chunk_size, args=(parser,) + args, concatenate=False)
+    )
+    for stage, seconds in computed_timings.items():
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+    results = [(mol, None) for mol, _ in parsed]
+    computed_values = {}
+    for i, (_, value) in zip(missing, computed):
+        # Keep the parsed molecule, the one returned by a worker process is a copy
+        results[i] = (parsed[i][0], value)
+        computed_values[parsed[i][1]] = value
+    if cache is not None:
+        # Values that could not be computed (e.g. timeouts) are not stored
+        cache.put({key: to_bytes(value) for key, value in computed_values.items() if value is not None})
+    for i, (mol, key) in enumerate(parsed):
+        if mol is None:
+            continue
+        if key in rows:
+            results[i] = (mol, from_bytes(rows[key]))
+        elif dedupe:
+            results[i] = (mol, computed_values[key])
+
+    return results, timings
+
+
+def _ecfp_chunk(encodings, encoding_function, radius, nBits):
+    # Parse and fingerprint a chunk of encodings, returning a (mol, packed bits) pair per encoding and the per-stage timings
+    if isinstance(encoding_function, str):
+        encoding_function = _ENCODING_FUNCTIONS[encoding_function]
+
+    timings = {"parse": 0.0, "AddHs": 0.0, "fingerprint": 0.0}
+    mols = [_prepare_mol(encoding, encoding_function, timings) for encoding in encodings]
+
+    # A single generator fingerprints the whole chunk, each fingerprint is packed as it is computed so that
+    # the unpacked bits of only one molecule are held in memory
+    start = time.perf_counter()
+    fpgen = AllChem.GetRDKitFPGenerator(maxPath=radius, fpSize=nBits)
+    packed_fingerprints = np.zeros((len(mols), (nBits + 7) // 8), dtype=np.uint8)
+    for i, mol in enumerate(mols):
+        if mol is not None:
+            packed_fingerprints[i] = np.packbits(fpgen.GetFingerprintAsNumPy(mol))
+    timings["fingerprint"] += time.perf_counter() - start
+
+    results = [(None, None) if mol is None else (mol, packed_bits) for mol, packed_bits in zip(mols, packed_fingerprints)]
+    return results, timings
+
+
+class _DescriptorTimeout(BaseException):
+    # Not derived from Exception, otherwise mordred would record it as a missing descriptor and go on
+    pass
+
+
+def _raise_descriptor_timeout(signum, frame):
+    raise _DescriptorTimeout()
+
+
+def _mordred_chunk(encodings, encoding_function, timeout):
+    # Parse a chunk of encodings and calculate their descriptors, returning a (mol, values) pair per encoding and the
+    # per-stage timings. values is None when the calculation did not finish within timeout seconds.
+    if isinstance(encoding_function, str):
+        encoding_function = _ENCODING_FUNCTIONS[encoding_function]
+
+    calc = _mordred_calculator()
+    use_timer = timeout is not None and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if timeout is not None and not use_timer:
+        warnings.warn("The descriptors timeout needs SIGALRM and the main thread, the calculations are not interrupted.")
+    if use_timer:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_descriptor_timeout)
+
+    results = []
+    timings = {"parse": 0.0, "AddHs": 0.0, "descriptors": 0.0}
+    try:
+        for encoding in encodings:
+            mol = _prepare_mol(encoding, encoding_function, timings)
+            if mol is None:
+                results.append((None, None))
+                continue
+            start = time.perf_counter()
+            if not use_timer:
+                results.append((mol, calc(mol)._values))
+                timings["descriptors"] += time.perf_counter() - start
+                continue
+            # The alarm interrupts the calculation between Python instructions, not inside a call to native code.
+            # The timer is disarmed inside the try, so that an alarm going off just after the calculation is caught
+            # as a timeout of this molecule. The finally clause disarms it after other errors, and must not let a
+            # late alarm abort the whole chunk either.
+            try:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                calculated_values = calc(mol)._values
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            except _DescriptorTimeout:
+                calculated_values = None
+            finally:
+                try:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                except _DescriptorTimeout:
+                    pass
+            timings["descriptors"] += time.perf_counter() - start
+            results.append((mol, calculated_values))
+    finally:
+        if use_timer:
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return results, timings
+
+
+def _float_bytes(values):
+    return np.asarray(values, dtype=np.float64).tobytes()
+
+
+def _float_list(row):
+    return np.frombuffer(row, dtype=np.float64).tolist()
+
+
+def _count_bits(packed_fingerprints, nBits, block_size=65536):
+    # Number of molecules having each bit set, unpacking one block of rows at a time
+    bit_counts = np.zeros(nBits, dtype=np.int64)
+    for start in range(0, len(packed_fingerprints), block_size):
+        block = np.unpackbits(packed_fingerprints[start : start + block_size], axis=1, count=nBits)
+        bit_counts += block.sum(axis=0, dtype=np.int64)
+    return bit_counts
+
+
+def _unpack_bits(packed_fingerprints, nBits, selected_bits, sparse=False, block_size=65536):
+    # Unpack only the selected bit columns into a 0/1 uint8 matrix, dense or CSR
+    if sparse:
+        blocks = [sp.csr_matrix((0, len(selected_bits)), dtype=np.uint8)]
+    else:
+        bits = np.empty((len(packed_fingerprints), len(selected_bits)), dtype=np.uint8)
+    for start in range(0, len(packed_fingerprints), block_size):
+        block = np.unpackbits(packed_fingerprints[start : start + block_size], axis=1, count=nBits)
+        if sparse:
+            blocks.append(sp.csr_matrix(block[:, selected_bits]))
+        else:
+            bits[start : start + block_size] = block[:, selected_bits]
+    if sparse:
+        return sp.vstack(blocks, format="csr")
+    return bits
@@ -0,0 +1,166 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# Parsing of molecules encodings
+#
+# License: BSD 3 clause
+import time
+
+import numpy as np
+from rdkit import Chem
+
+from chemplot.utils import map_chunks
+
+# Parsers are looked up by name inside worker processes because RDKit functions cannot be pickled
+_ENCODING_FUNCTIONS = {"SMILES": Chem.MolFromSmiles, "InChi": Chem.MolFromInchi}
+
+
+class MoleculeSet(object):
+    """
+    A class holding a list of molecules encodings parsed once, so that the
+    same molecules can be shared by the descriptors and fingerprints
+    calculations (e.g. to build both a structural and a tailored Plotter).
+    Instances can be passed in place of the encodings list to
+    Plotter.from_smiles, Plotter.from_inchi and the descriptors functions.
+
+    :param encodings: list of the molecules encodings
+    :param encoding_name: name of the encoding (SMILES or InChi)
+    :param mols: list of the parsed molecules with explicit hydrogens, None for the erroneous encodings
+    :param canonical_smiles: list of the canonical SMILES of the molecules, None for the erroneous encodings
+    :param valid: mask of the encodings that could be parsed
+    :type encodings: list
+    :type encoding_name: string
+    :type mols: list
+    :type canonical_smiles: list
+    :type valid: numpy.ndarray
+    """
+
+    def __init__(self, encodings, encoding_name, mols, canonical_smiles):
+        self.encodings = list(encodings)
+        self.encoding_name = encoding_name
+        self.mols = list(mols)
+        self.canonical_smiles = list(canonical_smiles)
+        self.valid = np.array([mol is not None for mol in self.mols], dtype=bool)
+
+    @classmethod
+    def from_smiles(cls, smiles_list, n_jobs=1, chunk_size=None):
+        """
+        Class method to parse a list of SMILES.
+
+        :param smiles_list: List of SMILES
+        :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+        :param chunk_size: Number of molecules sent to a worker at once
+        :type smiles_list: list
+        :type n_jobs: int
+        :type chunk_size: int
+        :returns: The parsed molecules
+        :rtype: MoleculeSet
+        """
+
+        return cls.parse(smiles_list, Chem.MolFromSmiles, "SMILES", n_jobs, chunk_size)
+
+    @classmethod
+    def from_inchi(cls, inchi_list, n_jobs=1, chunk_size=None):
+        """
+        Class method to parse a list of InChi.
+
+        :param inchi_list: List of InChi
+        :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+        :param chunk_size: Number of molecules sent to a worker at once
+        :type inchi_list: list
+        :type n_jobs: int
+        :type chunk_size: int
+        :returns: The parsed molecules
+        :rtype: MoleculeSet
+        """
+
+        return cls.parse(inchi_list, Chem.MolFromInchi, "InChi", n_jobs, chunk_size)
+
+    @classmethod
+    def parse(cls, encoding_list, encoding_function, encoding_name, n_jobs=1, chunk_size=None):
+        """
+        Class method to parse a list of molecules encodings.
+
+        :param encoding_list: List of molecules encodings
+        :param encoding_function: Function used to extract the molecules from the encodings
+        :param encoding_name: Name of the encoding
+        :param n_jobs: Number of worker processes. -1 uses all the available CPUs.
+        :param chunk_size: Number of molecules sent to a worker at once
+        :type encoding_list: list
+        :type encoding_function: fun
+        :type encoding_name: string
+        :type n_jobs: int
+        :type chunk_size: int
+        :returns: The parsed molecules
+        :rtype: MoleculeSet
+        """
+
+        encoding_list = list(encoding_list)
+        parser = _picklable_parser(encoding_function, encoding_name)
+        parsed, _ = _merge_chunks(map_chunks(_canonical_chunk, encoding_list, n_jobs, chunk_size, args=(parser,), concatenate=False))
+        mols = [mol for mol, _ in parsed]
+        canonical_smiles = [key for _, key in parsed]
+
+        return cls(encoding_list, encoding_name, mols, canonical_smiles)
+
+    def __len__(self):
+        return len(self.encodings)
+
+
+def _picklable_parser(encoding_function, encoding_name):
+    # Replace the known RDKit parsers by their name so that they can be sent to worker processes
+    if _ENCODING_FUNCTIONS.get(encoding_name) is encoding_function:
+        return encoding_name
+    return encoding_function
+
+
+def _prepare_mol(encoding, encoding_function, timings=None):
+    # Parse an encoding into a molecule with explicit hydrogens, molecules already parsed are kept as they are.
+    # The seconds spent parsing and adding the hydrogens are added to timings when given.
+    if isinstance(encoding, Chem.Mol):
+        return encoding
+    if isinstance(encoding_function, str):
+        encoding_function = _ENCODING_FUNCTIONS[encoding_function]
+    start = time.perf_counter()
+    mol = encoding_function(encoding)
+    parsed = time.perf_counter()
+    if mol is not None:
+        mol = Chem.AddHs(mol)
+    if timings is not None:
+        timings["parse"] = timings.get("parse", 0.0) + parsed - start
+        timings["AddHs"] = timings.get("AddHs", 0.0) + time.perf_counter() - parsed
+    return mol
+
+
+def _canonical_chunk(encodings, encoding_function):
+    # Parse a chunk of encodings, returning a (mol, canonical SMILES) pair per encoding and the per-stage timings
+    if isinstance(encoding_function, str):
+        encoding_function = _ENCODING_FUNCTIONS[encoding_function]
+
+    results = []
+    timings = {"parse": 0.0, "AddHs": 0.0, "canonicalize": 0.0}
+    for encoding in encodings:
+        start = time.perf_counter()
+        mol = encoding_function(encoding)
+        parsed = time.perf_counter()
+        if mol is None:
+            results.append((None, None))
+            timings["parse"] += parsed - start
+            continue
+        canonical_smiles = Chem.MolToSmiles(mol)
+        canonicalized = time.perf_counter()
+        results.append((Chem.AddHs(mol), canonical_smiles))
+        timings["parse"] += parsed - start
+        timings["canonicalize"] += canonicalized - parsed
+        timings["AddHs"] += time.perf_counter() - canonicalized
+
+    return results, timings
+
+
+def _merge_chunks(chunks):
+    # Concatenate the (results, timings) pairs returned by the chunks, summing the seconds spent in each stage
+    results = []
+    timings = {}
+    for chunk_results, chunk_timings in chunks:
+        results.extend(chunk_results)
+        for stage, seconds in chunk_timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    return results, timings
@@ -0,0 +1,338 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# Nearest neighbours of bit-packed fingerprints by Tanimoto distance
+#
+# License: BSD 3 clause
+import numpy as np
+import scipy.sparse as sp
+
+# Number of bits set in each byte value
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def pack_fingerprints(fingerprints, block_size=65536):
+    """
+    Packs a fingerprint matrix 8 bits per byte, one row per molecule.
+
+    :param fingerprints: Dense or sparse matrix of the fingerprint bits (non-zero values are set bits)
+    :param block_size: Number of rows of a sparse matrix densified at once
+    :type fingerprints: numpy.ndarray or scipy.sparse.csr_matrix
+    :type block_size: int
+    :returns: The bit-packed fingerprints
+    :rtype: numpy.ndarray
+    """
+    if not sp.issparse(fingerprints):
+        return np.packbits(np.asarray(fingerprints) != 0, axis=1)
+
+    fingerprints = sp.csr_matrix(fingerprints)
+    packed_fingerprints = np.zeros((fingerprints.shape[0], (fingerprints.shape[1] + 7) // 8), dtype=np.uint8)
+    for start in range(0, fingerprints.shape[0], block_size):
+        block = fingerprints[start : start + block_size].toarray() != 0
+        packed_fingerprints[start : start + block_size] = np.packbits(block, axis=1)
+    return packed_fingerprints
+
+
+def popcount(packed_fingerprints):
+    """
+    Counts the bits set in each bit-packed fingerprint.
+
+    :param packed_fingerprints: Bit-packed fingerprints, one row per molecule
+    :type packed_fingerprints: numpy.ndarray
+    :returns: The number of bits set in each fingerprint
+    :rtype: numpy.ndarray
+    """
+    if hasattr(np, "bitwise_count") and packed_fingerprints.shape[1] % 8 == 0:
+        # Count 64 bits at once (numpy >= 2.0)
+        words = np.ascontiguousarray(packed_fingerprints).view(np.uint64)
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[packed_fingerprints].sum(axis=1, dtype=np.int64)
+
+
+def tanimoto_distances(packed_queries, packed_fingerprints, fingerprints_counts=None):
+    """
+    Computes the Tanimoto (Jaccard) distances between two sets of bit-packed fingerprints.
+
+    :param packed_queries: Bit-packed fingerprints of the query molecules
+    :param packed_fingerprints: Bit-packed fingerprints of the reference molecules
+    :param fingerprints_counts: Number of bits set in each reference fingerprint, computed if not given
+    :type packed_queries: numpy.ndarray
+    :type packed_fingerprints: numpy.ndarray
+    :type fingerprints_counts: numpy.ndarray
+    :returns: The matrix of distances, one row per query molecule
+    :rtype: numpy.ndarray
+    """
+    if fingerprints_counts is None:
+        fingerprints_counts = popcount(packed_fingerprints)
+    queries_counts = popcount(packed_queries)
+    # The bits in common are counted by a product of the unpacked bits
+    intersection = np.unpackbits(packed_queries, axis=1).astype(np.float32) @ np.unpackbits(packed_fingerprints, axis=1).astype(np.float32).T
+    union = queries_counts[:, np.newaxis] + fingerprints_counts[np.newaxis, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = np.where(union > 0, 1.0 - intersection / union, 0.0)
+    return distances
+
+
+def maxmin(data, n_picks, metric="euclidean", random_state=None):
+    """
+    Picks diverse molecules by MaxMin: starting from a random molecule, the molecule
+    farthest from the ones already picked is added until n_picks are picked.
+
+    :param data: Features of the molecules, bit-packed fingerprints for the Tanimoto metric
+    :param n_picks: Number of molecules picked
+    :param metric: Distance between the molecules, euclidean or tanimoto
+    :param random_state: Random seed or generator of the first molecule
+    :type data: numpy.ndarray or scipy.sparse.csr_matrix
+    :type n_picks: int
+    :type metric: string
+    :type random_state: int
+    :returns: The indices of the picked molecules, in the order they have been picked
+    :rtype: numpy.ndarray
+    """
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+    n_molecules = data.shape[0]
+    n_picks = min(n_picks, n_molecules)
+    if metric == "tanimoto":
+        counts = popcount(data)
+    else:
+        from sklearn.metrics.pairwise import euclidean_distances
+
+        squared_norms = np.asarray(data.multiply(data).sum(axis=1)).ravel() if sp.issparse(data) else np.einsum("ij,ij->i", data, data)
+
+    picks = np.zeros(n_picks, dtype=np.int64)
+    picks[0] = random_state.randint(n_molecules)
+    min_distances = np.full(n_molecules, np.inf)
+    for i in range(1, n_picks):
+        last = picks[i - 1]
+        # Distances of all the molecules to the molecule picked last
+        if metric == "tanimoto":
+            intersection = popcount(data & data[last])
+            union = counts + counts[last] - intersection
+            with np.errstate(divide="ignore", invalid="ignore"):
+                distances = np.where(union > 0, 1.0 - intersection / union, 0.0)
+        else:
+            distances = euclidean_distances(data, data[last : last + 1], X_norm_squared=squared_norms[:, np.newaxis]).ravel()
+        min_distances = np.minimum(min_distances, distances)
+        min_distances[picks[:i]] = -1.0
+        picks[i] = np.argmax(min_distances)
+    return picks
+
+
+def _from_log_similarity(distances):
+    # NN-descent searches the negative log of the Tanimoto similarity, convert it back to the Tanimoto distance
+    return (1.0 - np.exp(-distances)).astype(np.float32)
+
+
+class NeighborsGraph(object):
+    """
+    Base class of the nearest neighbours graphs shared by the embeddings of a
+    Plotter. The neighbours of each reference molecule are stored with the
+    molecule itself first, so that the graph can be passed to UMAP as
+    precomputed_knn and to t-SNE as a precomputed distance matrix.
+    Small sets are searched exactly, the graph of larger sets is approximated
+    by NN-descent.
+
+    :param n_neighbors: number of neighbours of each molecule, the molecule itself included
+    :param random_state: random seed of the NN-descent
+    :param exact_size: largest number of molecules searched exactly
+    :param indices: indices of the neighbours of each reference molecule, the molecule itself first
+    :param distances: distances of the neighbours of each reference molecule
+    :param index: NN-descent search index, None if the search is exact
+    :type n_neighbors: int
+    :type random_state: int
+    :type exact_size: int
+    :type indices: numpy.ndarray
+    :type distances: numpy.ndarray
+    :type index: pynndescent.NNDescent
+    """
+
+    metric = None
+
+    def __init__(self, n_neighbors, random_state=None, exact_size=4096):
+        self.n_neighbors = n_neighbors
+        self.random_state = random_state
+        self.exact_size = exact_size
+        self.indices = None
+        self.distances = None
+        self.index = None
+
+    def fit(self, data):
+        """
+        Builds the neighbours graph of the reference molecules.
+
+        :param data: Features of the reference molecules
+        :type data: numpy.ndarray or scipy.sparse.csr_matrix
+        :returns: The fitted object
+        :rtype: NeighborsGraph
+        """
+        raise NotImplementedError
+
+    def kneighbors(self, queries, n_neighbors):
+        """
+        Finds the nearest reference molecules of new molecules.
+
+        :param queries: Features of the new molecules
+        :param n_neighbors: Number of neighbours of each new molecule
+        :type queries: numpy.ndarray or scipy.sparse.csr_matrix
+        :type n_neighbors: int
+        :returns: The indices and the distances of the neighbours of each new molecule
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def distance_matrix(self, n_neighbors=None):
+        """
+        Returns the neighbours graph as a sparse matrix of distances, as accepted by
+        estimators with metric="precomputed" (e.g. sklearn.manifold.TSNE).
+
+        :param n_neighbors: Number of neighbours of each molecule kept, the molecule itself included. All by default.
+        :type n_neighbors: int
+        :returns: The square matrix of the distances to the neighbours
+        :rtype: scipy.sparse.csr_matrix
+        """
+        indices = self.indices[:, :n_neighbors]
+        distances = self.distances[:, :n_neighbors]
+        # Approximate graphs flag missing neighbours with negative indices, they are moved to the end of their rows.
+        # Each row is sorted by distance, as expected by the estimators, and built as is so that the order is kept.
+        order = np.argsort(np.where(indices >= 0, distances, np.inf), axis=1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+        found = indices >= 0
+        indptr = np.concatenate([[0], np.cumsum(found.sum(axis=1))])
+        n_molecules = len(indices)
+        return sp.csr_matrix((distances[found], indices[found], indptr), shape=(n_molecules, n_molecules))
+
+    def knn(self, n_neighbors=None):
+        """
+        Returns the neighbours graph in the form accepted by umap.UMAP as precomputed_knn.
+
+        :param n_neighbors: Number of neighbours of each molecule kept, the molecule itself included. All by default.
+        :type n_neighbors: int
+        :returns: The indices and the distances of the neighbours of each reference molecule
+        :rtype: tuple
+        """
+        return np.ascontiguousarray(self.indices[:, :n_neighbors]), np.ascontiguousarray(self.distances[:, :n_neighbors])
+
+
+class EuclideanNeighbors(NeighborsGraph):
+    """
+    A class used to find the nearest neighbours of molecules by euclidean
+    distance between their (scaled or reduced) descriptors.
+
+    :param data: features of the reference molecules
+    :type data: numpy.ndarray or scipy.sparse.csr_matrix
+    """
+
+    metric = "euclidean"
+
+    def __init__(self, n_neighbors, random_state=None, exact_size=4096):
+        super().__init__(n_neighbors, random_state, exact_size)
+        self.data = None
+        self.__nearest_neighbors = None
+
+    def fit(self, data):
+        self.data = data
+        n_molecules = data.shape[0]
+        n_neighbors = min(self.n_neighbors, n_molecules)
+        if n_molecules <= self.exact_size:
+            from sklearn.neighbors import NearestNeighbors
+
+            self.index = None
+            self.__nearest_neighbors = NearestNeighbors().fit(data)
+            # Search the other molecules and put each molecule first among its own neighbours
+            self.indices = np.arange(n_molecules)[:, np.newaxis]
+            self.distances = np.zeros((n_molecules, 1), dtype=np.float32)
+            if n_neighbors > 1:
+                distances, indices = self.__nearest_neighbors.kneighbors(n_neighbors=n_neighbors - 1)
+                self.indices = np.hstack([self.indices, indices])
+                self.distances = np.hstack([self.distances, distances.astype(np.float32)])
+        else:
+            from pynndescent import NNDescent
+
+            self.index = NNDescent(data, metric="euclidean", n_neighbors=n_neighbors, random_state=self.random_state)
+            self.indices, self.distances = self.index.neighbor_graph
+        return self
+
+    def kneighbors(self, queries, n_neighbors):
+        n_neighbors = min(n_neighbors, self.data.shape[0])
+        if self.index is None:
+            distances, indices = self.__nearest_neighbors.kneighbors(queries, n_neighbors=n_neighbors)
+            return indices, distances
+        return self.index.query(queries, k=n_neighbors)
+
+
+class TanimotoNeighbors(NeighborsGraph):
+    """
+    A class used to find the nearest neighbours of bit-packed fingerprints by
+    Tanimoto distance. The neighbours graph of large sets is approximated by
+    NN-descent on popcount Jaccard distances.
+
+    :param block_size: number of query molecules compared at once by the exact search
+    :param packed_fingerprints: bit-packed fingerprints of the reference molecules
+    :type block_size: int
+    :type packed_fingerprints: numpy.ndarray
+    """
+
+    metric = "tanimoto"
+
+    def __init__(self, n_neighbors, random_state=None, exact_size=4096, block_size=1024):
+        super().__init__(n_neighbors, random_state, exact_size)
+        self.block_size = block_size
+        self.packed_fingerprints = None
+
+    def fit(self, packed_fingerprints):
+        """
+        Builds the neighbours graph of the reference molecules.
+
+        :param packed_fingerprints: Bit-packed fingerprints of the reference molecules
+        :type packed_fingerprints: numpy.ndarray
+        :returns: The fitted object
+        :rtype: TanimotoNeighbors
+        """
+        self.packed_fingerprints = np.ascontiguousarray(packed_fingerprints, dtype=np.uint8)
+        n_neighbors = min(self.n_neighbors, len(self.packed_fingerprints))
+        if len(self.packed_fingerprints) <= self.exact_size:
+            self.index = None
+            self.indices, self.distances = self.__exact_kneighbors(self.packed_fingerprints, n_neighbors, exclude_self=True)
+        else:
+            from pynndescent import NNDescent
+
+            self.index = NNDescent(self.packed_fingerprints, metric="bit_jaccard", n_neighbors=n_neighbors, random_state=self.random_state)
+            indices, distances = self.index.neighbor_graph
+            self.indices, self.distances = indices, _from_log_similarity(distances)
+        return self
+
+    def kneighbors(self, packed_queries, n_neighbors):
+        """
+        Finds the nearest reference molecules of new molecules.
+
+        :param packed_queries: Bit-packed fingerprints of the new molecules
+        :param n_neighbors: Number of neighbours of each new molecule
+        :type packed_queries: numpy.ndarray
+        :type n_neighbors: int
+        :returns: The indices and the Tanimoto distances of the neighbours of each new molecule
+        :rtype: tuple
+        """
+        n_neighbors = min(n_neighbors, len(self.packed_fingerprints))
+        packed_queries = np.ascontiguousarray(packed_queries, dtype=np.uint8)
+        if self.index is None:
+            return self.__exact_kneighbors(packed_queries, n_neighbors)
+        indices, distances = self.index.query(packed_queries, k=n_neighbors)
+        return indices, _from_log_similarity(distances)
+
+    def __exact_kneighbors(self, packed_queries, n_neighbors, exclude_self=False):
+        # Compare blocks of queries with all the reference fingerprints and keep the closest ones.
+        # When the queries are the reference molecules each molecule is put first among its own neighbours.
+        counts = popcount(self.packed_fingerprints)
+        indices = np.zeros((len(packed_queries), n_neighbors), dtype=np.int64)
+        distances = np.zeros((len(packed_queries), n_neighbors), dtype=np.float32)
+        for start in range(0, len(packed_queries), self.block_size):
+            block_distances = tanimoto_distances(packed_queries[start : start + self.block_size], self.packed_fingerprints, counts)
+            if exclude_self:
+                block_rows = np.arange(len(block_distances))
+                block_distances[block_rows, start + block_rows] = -1.0
+            closest = np.argpartition(block_distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+            closest_distances = np.take_along_axis(block_distances, closest, axis=1)
+            order = np.argsort(closest_distances, axis=1, kind="stable")
+            indices[start : start + self.block_size] = np.take_along_axis(closest, order, axis=1)
+            distances[start : start + self.block_size] = np.maximum(np.take_along_axis(closest_distances, order, axis=1), 0.0)
+        return indices, distances
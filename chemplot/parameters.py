@@ -83,6 +83,94 @@ MIN_DIST_STRUCTURAL = 0.485
 MIN_DIST_TAILORED = 0.47
 MIN_DIST_STRUCTURAL_PCA = 0.36
 
+######### Landmarks Parameters #########
+# Number of nearest landmarks a molecule is placed from
+LANDMARK_NEIGHBORS = 5
+# Size of the random pool the landmarks are picked from, as a multiple of the number of landmarks
+LANDMARK_POOL_FACTOR = 10
+
+######### Raster Plot Parameters #########
+# Number of bins per side of the grid the molecules are aggregated in by raster plots
+RASTER_BINS = 400
+
+######### Level of Detail Parameters #########
+# Largest number of molecules shown by a tile of the level of detail pyramid of interactive plots
+LOD_TILE_POINTS = 10000
+# Last level of the pyramid, made of 2^LOD_MAX_LEVEL x 2^LOD_MAX_LEVEL tiles showing all the remaining molecules
+LOD_MAX_LEVEL = 6
+# Number of hexagons per side of the density layer shown with the first level
+LOD_HEX_BINS = 50
+
+LOD_CALLBACK = """
+    // Level of the pyramid shown for the zoom of the view, the density layer is only shown with the first level
+    const width = bounds[1] - bounds[0];
+    const height = bounds[3] - bounds[2];
+    const zoom = Math.min(width / (x_range.end - x_range.start), height / (y_range.end - y_range.start));
+    const level = Math.max(0, Math.min(n_levels - 1, Math.floor(Math.log2(zoom))));
+    if (hex != null) {
+        hex.visible = level == 0;
+    }
+
+    // Tiles of the levels after the first one up to the current level which intersect the view
+    const keys = [];
+    for (let l = 1; l <= level; l++) {
+        const n = 2 ** l;
+        const tile = (value, start, size) => Math.max(0, Math.min(n - 1, Math.floor(((value - start) / size) * n)));
+        for (let i = tile(x_range.start, bounds[0], width); i <= tile(x_range.end, bounds[0], width); i++) {
+            for (let j = tile(y_range.start, bounds[2], height); j <= tile(y_range.end, bounds[2], height); j++) {
+                const key = l + "_" + i + "_" + j;
+                if (available.includes(key)) {
+                    keys.push(url + "/" + key);
+                }
+            }
+        }
+    }
+
+    // Show the points of the tiles loaded for the latest view of the plot, loading the missing ones from their scripts.
+    // Each source receives the points of its group of clusters, or all of them if its group is null.
+    window.chemplotTiles = window.chemplotTiles || {};
+    window.chemplotViews = window.chemplotViews || {};
+    const tiles = window.chemplotTiles;
+    window.chemplotViews[url + "/" + view] = keys;
+    const update = () => {
+        sources.forEach((source, s) => {
+            const data = {};
+            for (const column of columns) {
+                data[column] = [];
+            }
+            for (const key of window.chemplotViews[url + "/" + view]) {
+                const points = tiles[key];
+                if (points == null) {
+                    continue;
+                }
+                for (let k = 0; k < points[columns[0]].length; k++) {
+                    if (groups[s] != null && points.clusters[k] != groups[s]) {
+                        continue;
+                    }
+                    for (const column of columns) {
+                        data[column].push(points[column][k]);
+                    }
+                }
+            }
+            source.data = data;
+        });
+    };
+    for (const key of keys) {
+        if (!(key in tiles)) {
+            tiles[key] = null;
+            const script = document.createElement("script");
+            script.src = key + ".js";
+            script.onload = update;
+            document.head.appendChild(script);
+        }
+    }
+    update();
+"""
+
+######### Clustering Parameters #########
+# Number of molecules sampled to score the number of clusters by silhouette
+CLUSTER_SCORE_SAMPLE = 5000
+
 ######### Tooltips Parameters #########
 TOOLTIPS_TARGET = """
         <div>
@@ -127,6 +215,49 @@ TOOLTIPS_CLUSTER = """
         </div>
     """
 
+# Number of depictions of molecules kept in memory by chemplot.depictions
+DEPICTION_CACHE_SIZE = 100000
+
+# Browser rendering of the tooltip images: the depiction of a molecule is drawn by RDKit.js from its SMILES
+# the first time it is hovered, and kept in the imgs column of the data source for the next hovers
+# The version is pinned so that saved plots keep rendering the same way
+RDKIT_JS = "https://unpkg.com/@rdkit/rdkit@2024.3.5-1.0.0/dist/RDKit_minimal.js"
+
+DEPICTION_CALLBACK = """
+    const data = cb_data.renderer.data_source.data;
+    const indices = cb_data.index.indices;
+    if (indices.length == 0) {
+        return;
+    }
+    if (window.chemplotRDKit == null) {
+        window.chemplotRDKit = new Promise((resolve, reject) => {
+            const script = document.createElement("script");
+            script.src = rdkit_js;
+            script.onload = () => window.initRDKitModule({locateFile: () => rdkit_js.replace(/[^/]*$/, "RDKit_minimal.wasm")}).then(resolve);
+            script.onerror = reject;
+            document.head.appendChild(script);
+        });
+    }
+    window.chemplotRDKit.then((rdkit) => {
+        let changed = false;
+        for (const i of indices) {
+            if (data.imgs[i] != "") {
+                continue;
+            }
+            const mol = rdkit.get_mol(data.smiles[i]);
+            if (mol != null) {
+                data.imgs[i] = "data:image/svg+xml;charset=utf-8," + encodeURIComponent(mol.get_svg(200, 130));
+                mol.delete();
+                changed = true;
+            }
+        }
+        // The images are set in place, the tooltip shown is only redrawn once the source is notified
+        if (changed) {
+            cb_data.renderer.data_source.change.emit();
+        }
+    });
+"""
+
 ######### Sample Dataset
 SAMPLE_DATASETS = {
     "C_1478_CLINTOX_2": ["C_1478_CLINTOX_2.csv", "Clintox", "C_1478_CLINTOX_2"],
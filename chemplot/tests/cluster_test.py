@@ -2,13 +2,14 @@ import unittest
 from io import StringIO
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from chemplot import Plotter
 
 
-@pytest.mark.usefixtures("logs_plotter")
+@pytest.mark.usefixtures("logs_plotter", "logs_structural")
 class TestCluster(unittest.TestCase):
     def test_default_n_cluster(self):
         """
@@ -45,6 +46,71 @@ class TestCluster(unittest.TestCase):
         assert result is None
         assert "Reduce the dimensions of your molecules before clustering." in mock_stdout.getvalue()
 
+    def test_algorithms(self):
+        """
+        5. Test checks if k-means keeps the labels of sklearn and HDBSCAN numbers the clusters from the largest one
+        """
+        from sklearn.cluster import KMeans, MiniBatchKMeans
+
+        result = self.plotter_tailored_LOGS.pca()
+        data = result.iloc[:, :2].values
+        for algorithm, estimator in {"kmeans": KMeans, "minibatch": MiniBatchKMeans}.items():
+            result = self.plotter_tailored_LOGS.cluster(n_clusters=3, algorithm=algorithm, random_state=0)
+            self.assertEqual(result["clusters"].tolist(), estimator(3, random_state=0).fit_predict(data).tolist())
+        result = self.plotter_tailored_LOGS.cluster(algorithm="hdbscan", min_cluster_size=2)
+        counts = result.loc[result["clusters"] >= 0, "clusters"].value_counts().sort_index()
+        self.assertEqual(list(counts.index), list(range(len(counts))))
+        self.assertTrue(counts.is_monotonic_decreasing)
+
+    def test_descriptors_space(self):
+        """
+        6. Test checks if the molecules can be clustered on their descriptors instead of the embedding
+        """
+        result = self.plotter_tailored_LOGS.pca()
+        with patch("sklearn.cluster.KMeans.fit_predict", autospec=True, return_value=np.zeros(len(result), dtype=int)) as mock_fit:
+            self.plotter_tailored_LOGS.cluster(n_clusters=2, space="descriptors")
+        self.assertEqual(mock_fit.call_args[0][1].shape[1], self.plotter_tailored_LOGS._Plotter__df_descriptors.shape[1])
+        result = self.plotter_tailored_LOGS.cluster(n_clusters=2, space="descriptors")
+        self.assertEqual(len(set(result["clusters"])), 2)
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_unsupported_algorithm(self, mock_stdout):
+        """
+        7. Test checks if k-means is used when the algorithm is not supported
+        """
+        self.plotter_tailored_LOGS.pca()
+        result = self.plotter_tailored_LOGS.cluster(n_clusters=4, algorithm="spectral")
+        self.assertIn("k-means has been selected.", mock_stdout.getvalue())
+        self.assertEqual(len(set(result["clusters"])), 4)
+
+    def test_butina(self):
+        """
+        8. Test checks if the structural fingerprints are clustered by Butina, and other descriptors by k-means
+        """
+        self.plotter_structural_LOGS.pca()
+        result = self.plotter_structural_LOGS.cluster(algorithm="butina", threshold=0.0)
+        # Only molecules with the same fingerprint are in the same cluster
+        fingerprints = self.plotter_structural_LOGS._Plotter__df_descriptors.values
+        self.assertEqual(len(set(result["clusters"])), len(np.unique(fingerprints, axis=0)))
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = self.plotter_tailored_LOGS.cluster(n_clusters=3, algorithm="butina")
+        self.assertIn("Butina clustering is only available for structural fingerprints.", mock_stdout.getvalue())
+        self.assertEqual(len(set(result["clusters"])), 3)
+
+    def test_auto_n_clusters(self):
+        """
+        9. Test checks if the number of clusters with the best score is selected
+        """
+        self.plotter_tailored_LOGS.pca()
+        for score in ["silhouette", "calinski_harabasz"]:
+            result = self.plotter_tailored_LOGS.cluster(n_clusters="auto", k_range=range(2, 6), score=score, random_state=0)
+            self.assertEqual(list(result.attrs["scores"]), [2, 3, 4, 5])
+            self.assertEqual(result.attrs["n_clusters"], max(result.attrs["scores"], key=result.attrs["scores"].get))
+            self.assertEqual(len(set(result["clusters"])), result.attrs["n_clusters"])
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = self.plotter_tailored_LOGS.cluster(n_clusters="auto", k_range=range(2, 6), score="unsupported", random_state=0)
+        self.assertIn("The silhouette has been selected.", mock_stdout.getvalue())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+from rdkit import DataStructs
+from rdkit.ML.Cluster import Butina
+
+from chemplot.clustering import butina, butina_sweep, neighbor_pairs, select_n_clusters
+from chemplot.neighbors import pack_fingerprints
+
+
+class TestButina(unittest.TestCase):
+    def setUp(self):
+        self.fingerprints = np.random.RandomState(0).rand(150, 64) < 0.3
+        self.packed_fingerprints = pack_fingerprints(self.fingerprints)
+
+    def rdkit_clusters(self, threshold):
+        # Reference clusters computed by RDKit on the lower triangle of the distance matrix
+        bit_vectors = []
+        for fingerprint in self.fingerprints:
+            bit_vector = DataStructs.ExplicitBitVect(len(fingerprint))
+            bit_vector.SetBitsFromList(np.flatnonzero(fingerprint).tolist())
+            bit_vectors.append(bit_vector)
+        distances = []
+        for i in range(1, len(bit_vectors)):
+            distances.extend(1.0 - similarity for similarity in DataStructs.BulkTanimotoSimilarity(bit_vectors[i], bit_vectors[:i]))
+        clusters = Butina.ClusterData(distances, len(bit_vectors), threshold, isDistData=True)
+        return sorted(sorted(cluster) for cluster in clusters)
+
+    def test_rdkit_clusters(self):
+        """
+        1. Test checks if the clusters are the ones of the RDKit Butina implementation
+        """
+        labels = butina(self.packed_fingerprints, threshold=0.6, block_size=32)
+        clusters = [np.flatnonzero(labels == label).tolist() for label in range(labels.max() + 1)]
+        self.assertEqual(sorted(clusters), self.rdkit_clusters(0.6))
+
+    def test_neighbor_pairs(self):
+        """
+        2. Test checks if the pairs within the threshold are found once, whatever the block size and the number of workers
+        """
+        rows, cols, distances = neighbor_pairs(self.packed_fingerprints, 0.6, block_size=16)
+        self.assertTrue((rows < cols).all())
+        self.assertTrue((distances <= 0.6).all())
+        other_rows, other_cols, _ = neighbor_pairs(self.packed_fingerprints, 0.6, block_size=1024)
+        self.assertEqual(sorted(zip(rows, cols)), sorted(zip(other_rows, other_cols)))
+        parallel = neighbor_pairs(self.packed_fingerprints, 0.6, n_jobs=2, block_size=16)
+        for values, parallel_values in zip((rows, cols, distances), parallel):
+            np.testing.assert_array_equal(values, parallel_values)
+
+    def test_sweep(self):
+        """
+        3. Test checks if the sweep gives the clusters of each threshold
+        """
+        labels = butina_sweep(self.packed_fingerprints, [0.5, 0.6, 0.7])
+        for threshold in [0.5, 0.6, 0.7]:
+            np.testing.assert_array_equal(labels[threshold], butina(self.packed_fingerprints, threshold))
+
+
+class TestSelectNClusters(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.RandomState(0)
+        centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+        self.data = np.concatenate([center + generator.randn(200, 2) for center in centers])
+
+    def test_scores(self):
+        """
+        1. Test checks if the number of separated clusters is selected, with the silhouette on a sample or on all the molecules
+        """
+        for score, sample_size in [("silhouette", 100), ("silhouette", 1000), ("calinski_harabasz", 100)]:
+            n_clusters, scores = select_n_clusters(self.data, range(2, 8), score=score, sample_size=sample_size, random_state=0)
+            self.assertEqual(n_clusters, 3)
+            self.assertEqual(list(scores), list(range(2, 8)))
+
+    def test_k_range(self):
+        """
+        2. Test checks if the numbers of clusters which cannot be scored are skipped
+        """
+        n_clusters, scores = select_n_clusters(self.data[:5], range(0, 10), random_state=0)
+        self.assertEqual(list(scores), [2, 3, 4])
+        with self.assertRaises(Exception):
+            select_n_clusters(self.data, range(0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
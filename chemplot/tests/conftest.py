@@ -135,6 +135,11 @@ def logs_structural(request, logs):
     request.cls.plotter_structural_LOGS = Plotter.from_smiles(logs["smiles"], target=logs["target"], target_type="R", sim_type="structural")
 
 
+@pytest.fixture(scope="class")
+def logs_sparse(request, logs):
+    request.cls.plotter_sparse_LOGS = Plotter.from_smiles(logs["smiles"], target=logs["target"], target_type="R", sim_type="structural", sparse=True)
+
+
 @pytest.fixture(scope="class")
 def visualize_data(request, logs, bbbp, sampl):
     request.cls.plotter_pca_LOGS = Plotter.from_smiles(logs["smiles"], target=logs["target"], target_type="R", sim_type="tailored")
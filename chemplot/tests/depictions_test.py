@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from rdkit import Chem
+
+from chemplot import depictions
+from chemplot.depictions import clear_depictions, depict
+
+
+class TestDepictions(unittest.TestCase):
+    def setUp(self):
+        clear_depictions()
+        self.mols = [Chem.AddHs(Chem.MolFromSmiles(smiles)) for smiles in ["CCO", "c1ccccc1", "OCC", "CCN"]]
+
+    def tearDown(self):
+        clear_depictions()
+
+    def test_memory_cache(self):
+        """
+        1. Test checks if each molecule is rendered once, duplicates and repeated calls reusing its depiction
+        """
+        with patch("chemplot.depictions._depict_chunk", wraps=depictions._depict_chunk) as mock_chunk:
+            images = depict(self.mols)
+            self.assertEqual(sum(len(call.args[0]) for call in mock_chunk.call_args_list), 3)
+            self.assertEqual(images[0], images[2])
+            self.assertTrue(all(image.startswith("data:image/jpeg;base64,") for image in images))
+            self.assertEqual(depict(self.mols), images)
+            self.assertEqual(sum(len(call.args[0]) for call in mock_chunk.call_args_list), 3)
+            # Another size is another depiction
+            self.assertNotEqual(depict(self.mols[:1], size=(100, 65)), images[:1])
+
+    def test_disk_cache(self):
+        """
+        2. Test checks if the depictions read from the cache match the rendered ones and are not rendered again
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            images = depict(self.mols, cache_dir=cache_dir)
+            clear_depictions()
+            with patch("chemplot.depictions._depict_chunk", side_effect=AssertionError("rendered again")):
+                self.assertEqual(depict(self.mols, cache_dir=cache_dir), images)
+
+    def test_n_jobs(self):
+        """
+        3. Test checks if the depictions rendered in parallel are the ones rendered serially
+        """
+        images = depict(self.mols)
+        clear_depictions()
+        self.assertEqual(depict(self.mols, n_jobs=2), images)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,16 @@
+import signal
+import tempfile
+import threading
 import unittest
+import warnings
 from io import StringIO
 from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
 import pytest
 
+import chemplot.descriptors as desc
 from chemplot import Plotter
 
 
@@ -600,6 +607,121 @@ class TestFromSmilesErroneusSMILES(unittest.TestCase):
         result = Plotter.from_smiles(["CCCC", "OOOOOC"], target=[0, 0], target_type="C", sim_type="structural")
         assert not result._Plotter__target
 
+    def test_n_jobs_structural(self):
+        """
+        58. Test if fingerprints computed in parallel match the serial ones
+        """
+        serial = Plotter.from_smiles(self.data_CLINTOX_2_erroneous_smiles["smiles"], sim_type="structural")
+        parallel = Plotter.from_smiles(self.data_CLINTOX_2_erroneous_smiles["smiles"], sim_type="structural", n_jobs=2)
+        pd.testing.assert_frame_equal(serial._Plotter__df_descriptors, parallel._Plotter__df_descriptors)
+        assert len(serial._Plotter__mols) == len(parallel._Plotter__mols)
+
+    @patch("builtins.print")
+    def test_n_jobs_erroneous_data_INFO_structural(self, mock_print):
+        """
+        59. Test if the erroneous data is reported in the same way when fingerprints are computed in parallel
+        """
+        Plotter.from_smiles(
+            self.data_CLINTOX_2_erroneous_smiles["smiles"],
+            target=self.data_CLINTOX_2_erroneous_smiles["target"],
+            target_type="C",
+            sim_type="structural",
+            n_jobs=2,
+        )
+        mock_print.assert_called_once_with(
+            "The following erroneous SMILES have been found in the data:\n[NH4][Pt]([NH4])(Cl)Cl\nc1ccc(cc1)n2c(=O)c(c(=O)n2c3ccccc3)CCS(=O)c4ccccc4\nCCCCc1c(=O)n(n(c1=O)c2ccc(cc2)O)c3ccccc3\nCCCCc1c(=O)n(n(c1=O)c2ccccc2)c3ccccc3.\nThe erroneous SMILES will be removed from the data."
+        )
+
+    def test_fingerprint_matrix_structural(self):
+        """
+        60. Test if the fingerprints are stored as a 0/1 uint8 matrix without constant bit columns
+        """
+        cp = Plotter.from_smiles(self.data_CLINTOX_2_erroneous_smiles["smiles"], sim_type="structural")
+        values = cp._Plotter__df_descriptors.values
+        assert values.dtype == "uint8"
+        assert set(values.ravel()) == {0, 1}
+        assert values.any(axis=0).all() and not values.all(axis=0).any()
+
+    def test_n_jobs_tailored(self):
+        """
+        61. Test if descriptors computed in parallel match the serial ones
+        """
+        smiles = self.data_BBBP_erroneous_smiles["smiles"].head(60)
+        target = self.data_BBBP_erroneous_smiles["target"].head(60)
+        serial = Plotter.from_smiles(smiles, target=target, target_type="C", sim_type="tailored")
+        parallel = Plotter.from_smiles(smiles, target=target, target_type="C", sim_type="tailored", n_jobs=2, chunk_size=7)
+        pd.testing.assert_frame_equal(serial._Plotter__df_descriptors, parallel._Plotter__df_descriptors)
+        assert serial._Plotter__target == parallel._Plotter__target
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_descriptors_timeout(self, mock_stdout):
+        """
+        62. Test if molecules whose descriptors calculation times out are reported and removed
+        """
+        if not hasattr(signal, "setitimer"):
+            pytest.skip("Timeouts require SIGALRM")
+        mols, df_descriptors, target = desc.get_mordred_descriptors(["CCCC", "CCO"], [0, 1], timeout=1e-6)
+        assert len(mols) == 0 and df_descriptors.empty
+        assert "For the following SMILES not all descriptors can be computed:\nCCCC\nCCO." in mock_stdout.getvalue()
+        # The timer cannot be used outside the main thread, the timeout is then ignored with a warning
+        results = []
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            thread = threading.Thread(target=lambda: results.append(desc._mordred_chunk(["CCO"], "SMILES", 1e-6)))
+            thread.start()
+            thread.join()
+        assert any("descriptors timeout" in str(warning.message) for warning in caught)
+        [(mol, values)], _ = results[0]
+        assert values is not None
+
+    def test_cache_dir(self):
+        """
+        63. Test if descriptors and fingerprints read from the cache match the computed ones and are not recomputed
+        """
+        smiles = self.data_BBBP_erroneous_smiles["smiles"].head(60)
+        target = self.data_BBBP_erroneous_smiles["target"].head(60)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for sim_type, chunk_function in [("tailored", "_mordred_chunk"), ("structural", "_ecfp_chunk")]:
+                computed = Plotter.from_smiles(smiles, target=target, target_type="C", sim_type=sim_type, cache_dir=cache_dir)
+                with patch("chemplot.descriptors." + chunk_function, side_effect=AssertionError("computed again")):
+                    cached = Plotter.from_smiles(smiles, target=target, target_type="C", sim_type=sim_type, cache_dir=cache_dir)
+                pd.testing.assert_frame_equal(computed._Plotter__df_descriptors, cached._Plotter__df_descriptors, check_dtype=False)
+                assert computed._Plotter__target == cached._Plotter__target
+
+    @patch("builtins.print")
+    def test_fingerprint_timings(self, mock_print):
+        """
+        64. Test if the per-stage timings of the fingerprints are reported without printing
+        """
+        mols, df_ecfp, target = desc.get_ecfp(["CCCC", "CCO", "c1ccccc1"], [0, 1, 0], n_jobs=2, chunk_size=2)
+        assert set(df_ecfp.attrs["timings"]) == {"parse", "AddHs", "fingerprint", "filter"}
+        assert all(seconds >= 0 for seconds in df_ecfp.attrs["timings"].values())
+        mock_print.assert_not_called()
+
+    def test_descriptors_dtype(self):
+        """
+        65. Test if descriptors can be stored as float32 and stay aligned with molecules and targets
+        """
+        smiles = ["CCCC", "CCO", "c1ccccc1", "CCN"]
+        mols, df_64, target_64 = desc.get_mordred_descriptors(smiles, pd.Series([0, None, 1, 0]))
+        mols_32, df_32, target_32 = desc.get_mordred_descriptors(smiles, pd.Series([0, None, 1, 0]), dtype=np.float32)
+        assert (df_64.dtypes == "float64").all() and (df_32.dtypes == "float32").all()
+        np.testing.assert_allclose(df_64.values, df_32.values, rtol=1e-6)
+        assert list(df_32.index) == [0, 2, 3] and target_32 == [0, 1, 0] and len(mols_32) == 3
+
+    def test_dedupe(self):
+        """
+        66. Test if identical molecules are computed once and their fingerprints are given back to every row
+        """
+        smiles = ["CCO", "OCC", "c1ccccc1", "C(O)C", "C1=CC=CC=C1", "CCN"]
+        target = [0, 1, 0, 1, 0, 1]
+        mols, expected, expected_target = desc.get_ecfp(smiles, target)
+        with patch("chemplot.descriptors._ecfp_chunk", wraps=desc._ecfp_chunk) as ecfp_chunk:
+            mols_dedupe, result, result_target = desc.get_ecfp(smiles, target, dedupe=True)
+        assert sum(len(call.args[0]) for call in ecfp_chunk.call_args_list) == 3
+        pd.testing.assert_frame_equal(expected, result)
+        assert expected_target == result_target and len(mols_dedupe) == len(smiles)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+# Cumulative import time of chemplot, in microseconds
+IMPORT_TIME_BUDGET = 5_000_000
+LAZY_MODULES = ["umap", "bokeh", "seaborn", "matplotlib", "mordred", "sklearn.manifold"]
+
+
+def import_times(statement):
+    # Run statement in a fresh interpreter and parse the cumulative time of each imported module
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImport(unittest.TestCase):
+    def test_import_time_budget(self):
+        """
+        1. Test checks if chemplot is imported within the time budget
+        """
+        times = import_times("import chemplot")
+        self.assertLess(times["chemplot"], IMPORT_TIME_BUDGET)
+
+    def test_lazy_modules(self):
+        """
+        2. Test checks if the plotting and embedding backends are not imported with chemplot
+        """
+        times = import_times("import chemplot")
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, times)
@@ -2,6 +2,7 @@ import base64
 import os
 import os.path
 import re
+import tempfile
 import unittest
 from io import BytesIO, StringIO
 from pathlib import Path
@@ -417,6 +418,103 @@ class TestInteractivePlot(unittest.TestCase):
             if isinstance(tool, bokeh.models.tools.HoverTool):
                 self.assertEqual(tool.tooltips, parameters.TOOLTIPS_CLUSTER)
 
+    def test_browser_images(self):
+        """
+        32. Test checks if the images are left to the browser, which renders them from the SMILES of the molecules
+        """
+        self.plotter_pca_BBBP.cluster(n_clusters=5)
+        with patch.object(Draw, "MolToImage") as mock_draw:
+            result = self.plotter_pca_BBBP.interactive_plot(kind="scatter", clusters=True, images="browser")
+        mock_draw.assert_not_called()
+        n_molecules = len(self.plotter_pca_BBBP._Plotter__mols)
+        for figure in [result.tabs[0].child, result.tabs[1].child]:
+            hover = figure.select_one(bokeh.models.HoverTool)
+            self.assertEqual(hover.callback.code, parameters.DEPICTION_CALLBACK)
+            self.assertEqual(hover.callback.args["rdkit_js"], parameters.RDKIT_JS)
+        # Saved plots load a fixed version of RDKit.js and redraw the tooltip once its image is rendered
+        self.assertRegex(parameters.RDKIT_JS, r"/@rdkit/rdkit@\d[^/]*/")
+        self.assertIn("change.emit()", parameters.DEPICTION_CALLBACK)
+        data = result.tabs[0].child.renderers[0].data_source.data
+        self.assertEqual(set(data["imgs"]), {""})
+        self.assertEqual(len(data["smiles"]), n_molecules)
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = self.plotter_pca_LOGS.interactive_plot(kind="scatter", images="unsupported")
+        self.assertIn("As default embedded has been taken.", mock_stdout.getvalue())
+        self.assertTrue(all(img.startswith("data:image/jpeg;base64,") for img in result.renderers[0].data_source.data["imgs"]))
+
+    def test_output_backend(self):
+        """
+        33. Test checks if the plots are drawn by the backend requested, from the columns they use with float32 coordinates
+        """
+        self.plotter_pca_BBBP.cluster(n_clusters=5)
+        result = self.plotter_pca_BBBP.interactive_plot(kind="scatter", clusters=True, output_backend="webgl")
+        plot, plot_clusters = result.tabs[0].child, result.tabs[1].child
+        self.assertEqual(plot.output_backend, "webgl")
+        self.assertEqual(plot_clusters.output_backend, "webgl")
+        x, y = self.plotter_pca_BBBP.df_plot_xy.columns
+        data = plot.renderers[0].data_source.data
+        self.assertEqual(set(data), {x, y, "imgs", "target"})
+        self.assertEqual(data[x].dtype, np.float32)
+        self.assertEqual(set(plot_clusters.renderers[0].data_source.data), {x, y, "imgs", "clusters"})
+        result = self.plotter_pca_LOGS.interactive_plot(kind="hex", output_backend="webgl")
+        self.assertEqual(result.output_backend, "webgl")
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = self.plotter_pca_LOGS.interactive_plot(kind="scatter", output_backend="unsupported")
+        self.assertIn("As default canvas has been taken.", mock_stdout.getvalue())
+        self.assertEqual(result.output_backend, "canvas")
+        # The target keeps its precision for the tooltips and the colour bar
+        data = result.renderers[0].data_source.data
+        self.assertEqual(data[self.plotter_pca_LOGS.df_plot_xy.columns[0]].dtype, np.float32)
+        self.assertEqual(data["target"].dtype, np.float64)
+        np.testing.assert_array_equal(data["target"], self.plotter_pca_LOGS.get_target())
+
+    def test_lod(self):
+        """
+        34. Test checks if the level of detail embeds the first level of the pyramid and writes the next levels next to the plot
+        """
+        n_molecules = len(self.plotter_pca_BBBP._Plotter__mols)
+        with tempfile.TemporaryDirectory() as directory, patch.object(parameters, "LOD_TILE_POINTS", 10):
+            filename = os.path.join(directory, "plot.html")
+            result = self.plotter_pca_BBBP.interactive_plot(kind="scatter", images="browser", filename=filename, lod=True)
+            tiles = os.listdir(os.path.join(directory, "plot_tiles"))
+            self.assertTrue(len(tiles) > 0 and all(tile.endswith(".js") for tile in tiles))
+        # The plot is no longer saved to the removed file when shown
+        bokeh.io.reset_output()
+        hex_renderer, renderer, detail_renderer = result.renderers
+        self.assertEqual(len(renderer.data_source.data["imgs"]), 10)
+        self.assertEqual(len(detail_renderer.data_source.data["imgs"]), 0)
+        self.assertEqual(hex_renderer.data_source.data["c"].sum(), n_molecules)
+        self.assertEqual(result.select_one(bokeh.models.HoverTool).renderers, [renderer, detail_renderer])
+        callback = result.js_event_callbacks["rangesupdate"][0]
+        self.assertEqual(callback.code, parameters.LOD_CALLBACK)
+        self.assertEqual(sorted(callback.args["available"]), sorted(tile[:-3] for tile in tiles))
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            result = self.plotter_pca_BBBP.interactive_plot(kind="scatter", images="browser", lod=True)
+        self.assertIn("The level of detail needs a filename", mock_stdout.getvalue())
+        self.assertEqual(len(result.renderers[0].data_source.data["imgs"]), n_molecules)
+
+    def test_lod_clusters(self):
+        """
+        35. Test checks if the clusters tab lists every cluster and loads the tiles of the level of detail
+        """
+        self.plotter_pca_BBBP.cluster(n_clusters=5, random_state=0)
+        with tempfile.TemporaryDirectory() as directory, patch.object(parameters, "LOD_TILE_POINTS", 10):
+            result = self.plotter_pca_BBBP.interactive_plot(kind="scatter", clusters=True, filename=os.path.join(directory, "plot.html"), lod=True)
+            tile = os.path.join(directory, "plot_tiles", sorted(os.listdir(os.path.join(directory, "plot_tiles")))[0])
+            with open(tile) as script:
+                self.assertIn('"clusters"', script.read())
+        bokeh.io.reset_output()
+        plot_clusters = result.tabs[1].child
+        self.assertEqual(len(plot_clusters.legend.items), 5)
+        # A renderer of the first level and a renderer of the tiles per cluster
+        self.assertEqual(len(plot_clusters.renderers), 10)
+        n_embedded = sum(len(renderer.data_source.data["imgs"]) for renderer in plot_clusters.renderers)
+        self.assertEqual(n_embedded, len(result.tabs[0].child.renderers[1].data_source.data["imgs"]))
+        callback = plot_clusters.js_event_callbacks["rangesupdate"][0]
+        self.assertEqual(len(callback.args["sources"]), 5)
+        self.assertEqual(callback.args["groups"], [item.label.value for item in plot_clusters.legend.items])
+        self.assertIsNone(callback.args["hex"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import pandas as pd
+import pytest
+
+from chemplot import MoleculeSet, Plotter
+
+
+@pytest.mark.usefixtures("logs_data")
+class TestMoleculeSet(unittest.TestCase):
+    def test_valid_mask(self):
+        """
+        1. Test checks if the erroneous encodings are flagged once at parsing
+        """
+        molecule_set = MoleculeSet.from_smiles(["CCO", "non_smile", "c1ccccc1"])
+        self.assertEqual(len(molecule_set), 3)
+        self.assertEqual(list(molecule_set.valid), [True, False, True])
+        self.assertIsNone(molecule_set.mols[1])
+        self.assertEqual(molecule_set.canonical_smiles[0], "CCO")
+
+    def test_parallel_parsing(self):
+        """
+        2. Test checks if parsing in parallel gives the same molecules
+        """
+        serial = MoleculeSet.from_smiles(self.data_LOGS["smiles"])
+        parallel = MoleculeSet.from_smiles(self.data_LOGS["smiles"], n_jobs=2, chunk_size=3)
+        self.assertEqual(serial.canonical_smiles, parallel.canonical_smiles)
+
+    def test_shared_by_plotters(self):
+        """
+        3. Test checks if structural and tailored Plotters built from a MoleculeSet match those built from SMILES
+        """
+        molecule_set = MoleculeSet.from_smiles(self.data_LOGS["smiles"])
+        for sim_type in ["structural", "tailored"]:
+            expected = Plotter.from_smiles(self.data_LOGS["smiles"], target=self.data_LOGS["target"], target_type="R", sim_type=sim_type)
+            result = Plotter.from_smiles(molecule_set, target=self.data_LOGS["target"], target_type="R", sim_type=sim_type)
+            pd.testing.assert_frame_equal(expected._Plotter__df_descriptors, result._Plotter__df_descriptors)
+            self.assertIs(result._Plotter__mols[0], molecule_set.mols[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
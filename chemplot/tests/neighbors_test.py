@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from chemplot.neighbors import (
+    EuclideanNeighbors,
+    TanimotoNeighbors,
+    maxmin,
+    pack_fingerprints,
+)
+
+
+class TestNeighbors(unittest.TestCase):
+    def setUp(self):
+        self.fingerprints = np.random.RandomState(0).rand(200, 64) < 0.2
+        intersection = self.fingerprints.astype(int) @ self.fingerprints.T.astype(int)
+        counts = self.fingerprints.sum(axis=1)
+        self.distances = 1.0 - intersection / (counts[:, np.newaxis] + counts[np.newaxis, :] - intersection)
+
+    def test_pack_sparse(self):
+        """
+        1. Test checks if dense and sparse fingerprints are packed in the same way
+        """
+        np.testing.assert_array_equal(pack_fingerprints(self.fingerprints), pack_fingerprints(csr_matrix(self.fingerprints)))
+
+    def test_exact(self):
+        """
+        2. Test checks if the exact search finds the closest molecules by Tanimoto distance, each molecule first
+        """
+        neighbors = TanimotoNeighbors(5).fit(pack_fingerprints(self.fingerprints))
+        self.assertIsNone(neighbors.index)
+        np.testing.assert_array_equal(neighbors.indices[:, 0], np.arange(len(self.fingerprints)))
+        np.testing.assert_allclose(neighbors.distances, np.sort(self.distances, axis=1)[:, :5], atol=1e-6)
+
+    def test_approximate(self):
+        """
+        3. Test checks if the NN-descent search returns Tanimoto distances
+        """
+        neighbors = TanimotoNeighbors(5, random_state=0, exact_size=0).fit(pack_fingerprints(self.fingerprints))
+        self.assertIsNotNone(neighbors.index)
+        rows = np.arange(len(self.fingerprints))[:, np.newaxis]
+        np.testing.assert_allclose(neighbors.distances, self.distances[rows, neighbors.indices], atol=1e-5)
+        indices, distances = neighbors.kneighbors(pack_fingerprints(self.fingerprints[:3]), 3)
+        np.testing.assert_allclose(distances, self.distances[rows[:3], indices], atol=1e-5)
+
+    def test_distance_matrix(self):
+        """
+        4. Test checks if the neighbours graph is returned as a square sparse matrix of distances
+        """
+        neighbors = TanimotoNeighbors(5).fit(pack_fingerprints(self.fingerprints))
+        matrix = neighbors.distance_matrix(3)
+        self.assertEqual(matrix.shape, (len(self.fingerprints), len(self.fingerprints)))
+        self.assertEqual(matrix[0, neighbors.indices[0, 1]], neighbors.distances[0, 1])
+
+    def test_euclidean(self):
+        """
+        5. Test checks if the euclidean graph puts each molecule first, followed by its closest molecules
+        """
+        data = np.random.RandomState(0).rand(100, 8)
+        distances = np.sqrt(((data[:, np.newaxis] - data[np.newaxis]) ** 2).sum(axis=2))
+        neighbors = EuclideanNeighbors(5).fit(data)
+        np.testing.assert_array_equal(neighbors.indices[:, 0], np.arange(len(data)))
+        np.testing.assert_allclose(neighbors.distances, np.sort(distances, axis=1)[:, :5], atol=1e-5)
+        # The approximate graph returns the distances of the neighbours it finds
+        neighbors = EuclideanNeighbors(5, random_state=0, exact_size=0).fit(data)
+        np.testing.assert_allclose(neighbors.distances, distances[np.arange(len(data))[:, np.newaxis], neighbors.indices], atol=1e-5)
+
+    def test_maxmin(self):
+        """
+        6. Test checks if MaxMin picks distinct molecules spread over the whole set
+        """
+        data = np.vstack([np.zeros((50, 4)), np.full((50, 4), 10.0)]) + np.random.RandomState(0).rand(100, 4)
+        picks = maxmin(data, 10, random_state=0)
+        self.assertEqual(len(set(picks)), 10)
+        self.assertEqual(len(set(picks[:2] // 50)), 2)
+        packed_picks = maxmin(pack_fingerprints(self.fingerprints), 10, "tanimoto", random_state=0)
+        self.assertEqual(len(set(packed_picks)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,15 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
 import pandas as pd
 import pytest
+from scipy.sparse import issparse
+from sklearn.decomposition import IncrementalPCA, TruncatedSVD
 
 
-@pytest.mark.usefixtures("logs_plotter")
+@pytest.mark.usefixtures("logs_plotter", "logs_sparse")
 class TestPCA(unittest.TestCase):
     def test_plot_title(self):
         """
@@ -54,6 +59,66 @@ class TestPCA(unittest.TestCase):
         result = self.plotter_tailored_LOGS.pca()
         self.assertEqual(list.sort(list(result["target"])), list.sort(self.plotter_tailored_LOGS._Plotter__target))
 
+    def test_sparse(self):
+        """
+        7. Test checks if sparse fingerprints are reduced by truncated SVD without being densified
+        """
+        result = self.plotter_sparse_LOGS.pca()
+        self.assertIsInstance(self.plotter_sparse_LOGS.pca_fit, TruncatedSVD)
+        self.assertTrue(issparse(self.plotter_sparse_LOGS._Plotter__data))
+        self.assertEqual(result.shape, (len(self.plotter_sparse_LOGS._Plotter__target), 3))
+
+    def test_scaled_data_reused(self):
+        """
+        8. Test checks if the scaled matrix and the PCA preprocessing are computed once and recomputed when the descriptors change
+        """
+        cp = self.plotter_tailored_LOGS
+        cp.pca()
+        scaled_data = cp._Plotter__data
+        self.assertTrue(scaled_data.flags["C_CONTIGUOUS"])
+        cp.tsne(random_state=0)
+        self.assertIs(cp._Plotter__data, scaled_data)
+        structural = self.plotter_no_target_LOGS
+        structural.tsne(pca=True, random_state=0)
+        reduced_data = structural._Plotter__data
+        self.assertLessEqual(reduced_data.shape[1], 10)
+        structural.umap(pca=True, random_state=0)
+        self.assertIs(structural._Plotter__data, reduced_data)
+        cp._Plotter__df_descriptors = cp._Plotter__df_descriptors.copy()
+        cp.pca()
+        self.assertIsNot(cp._Plotter__data, scaled_data)
+        pd.testing.assert_frame_equal(pd.DataFrame(cp._Plotter__data), pd.DataFrame(scaled_data))
+
+    def test_solvers(self):
+        """
+        9. Test checks if the randomized and incremental solvers give labelled components for every molecule
+        """
+        expected = self.plotter_tailored_LOGS.pca()
+        randomized = self.plotter_tailored_LOGS.pca(solver="randomized", random_state=0)
+        self.assertEqual(self.plotter_tailored_LOGS.pca_fit.svd_solver, "randomized")
+        self.assertEqual(list(randomized.columns), list(expected.columns))
+        incremental = self.plotter_tailored_LOGS.pca(solver="incremental", batch_size=50)
+        self.assertIsInstance(self.plotter_tailored_LOGS.pca_fit, IncrementalPCA)
+        self.assertRegex(incremental.columns[0], r"^PC-1 \(\d+%\)$")
+        self.assertEqual(incremental.shape, expected.shape)
+
+    def test_incremental_memmap(self):
+        """
+        10. Test checks if the incremental solver reads the batches from a memory-mapped descriptors matrix
+        """
+        df_descriptors = self.plotter_no_target_LOGS._Plotter__df_descriptors
+        with tempfile.TemporaryDirectory() as directory:
+            values = np.memmap(os.path.join(directory, "descriptors.dat"), dtype=np.uint8, mode="w+", shape=df_descriptors.shape)
+            values[:] = df_descriptors.values
+            self.plotter_no_target_LOGS._Plotter__df_descriptors = pd.DataFrame(values, columns=df_descriptors.columns, copy=False)
+            try:
+                result = self.plotter_no_target_LOGS.pca(solver="incremental", batch_size=40)
+            finally:
+                self.plotter_no_target_LOGS._Plotter__df_descriptors = df_descriptors
+                del values
+        self.assertEqual(len(result), len(df_descriptors))
+        self.assertFalse(np.isnan(result.iloc[:, :2].values).any())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from chemplot.tiles import point_levels, tile_index, write_tiles
+
+
+class TestTiles(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.RandomState(0)
+        # A dense cluster and sparse points around it
+        self.x = np.concatenate([generator.randn(3000) * 0.1, generator.uniform(-5, 5, 200)])
+        self.y = np.concatenate([generator.randn(3000) * 0.1, generator.uniform(-5, 5, 200)])
+
+    def test_point_levels(self):
+        """
+        1. Test checks if every tile shows at most tile_points points, the sparse points being shown first
+        """
+        levels, bounds = point_levels(self.x, self.y, 100, 6, random_state=0)
+        self.assertEqual(bounds, (self.x.min(), self.x.max(), self.y.min(), self.y.max()))
+        for level in range(levels.max()):
+            i, j = tile_index(self.x, self.y, bounds, level)
+            shown = levels <= level
+            _, counts = np.unique(np.stack([i[shown], j[shown]]), axis=1, return_counts=True)
+            self.assertLessEqual(counts.max(), 100)
+        # The sparse points are all shown once the tiles separate them from the dense cluster
+        self.assertTrue((levels[3000:][np.abs(self.x[3000:]) > 2] <= 3).all())
+        self.assertLess((levels[:3000] <= 3).mean(), 0.5)
+        # All the points are shown by the last level
+        self.assertTrue((levels <= 6).all())
+
+    def test_write_tiles(self):
+        """
+        2. Test checks if the points of the levels after the first one are written once, in the script of their tile
+        """
+        levels, bounds = point_levels(self.x, self.y, 100, 6, random_state=0)
+        data = {"x": self.x.astype(np.float32), "imgs": np.array([str(row) for row in range(len(self.x))], dtype=object)}
+        with tempfile.TemporaryDirectory() as directory:
+            tiles = os.path.join(directory, "plot_tiles")
+            keys = write_tiles(tiles, data, self.x, self.y, levels, bounds)
+            rows = []
+            for key in keys:
+                with open(os.path.join(tiles, key + ".js")) as script:
+                    prefix = f'window.chemplotTiles["plot_tiles/{key}"] = '
+                    line = [line for line in script if line.startswith(prefix)][0]
+                tile = json.loads(line[len(prefix) : -2])
+                level, i, j = map(int, key.split("_"))
+                tile_rows = np.array(tile["imgs"], dtype=int)
+                self.assertTrue((levels[tile_rows] == level).all())
+                np.testing.assert_array_equal(
+                    np.stack(tile_index(self.x[tile_rows], self.y[tile_rows], bounds, level)), [[i] * len(tile_rows), [j] * len(tile_rows)]
+                )
+                np.testing.assert_allclose(tile["x"], self.x[tile_rows], rtol=1e-6)
+                rows.extend(tile_rows)
+            self.assertEqual(sorted(rows), list(np.flatnonzero(levels > 0)))
+            # Tiles of a previous pyramid are removed
+            self.assertEqual(write_tiles(tiles, data, self.x, self.y, np.zeros(len(self.x), dtype=int), bounds), [])
+            self.assertEqual(os.listdir(tiles), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
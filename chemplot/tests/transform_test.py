@@ -0,0 +1,64 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from chemplot import Plotter
+
+
+@pytest.mark.usefixtures("logs_data", "logs_plotter")
+class TestTransformSmiles(unittest.TestCase):
+    @patch("builtins.print")
+    def test_no_embedding(self, mock_print):
+        """
+        1. Test checks if new molecules are only transformed after an embedding has been computed
+        """
+        cp = Plotter.from_smiles(self.data_LOGS["smiles"], sim_type="structural")
+        self.assertIsNone(cp.transform_smiles(["CCO"]))
+        mock_print.assert_called_once_with("Reduce the dimensions of your molecules before transforming new ones.")
+
+    def test_pca_reference_molecules(self):
+        """
+        2. Test checks if plotted molecules are projected on their own PCA coordinates
+        """
+        for cp in [self.plotter_tailored_LOGS, self.plotter_no_target_LOGS]:
+            result = cp.pca()
+            smiles = list(self.data_LOGS["smiles"].iloc[:10])
+            transformed = cp.transform_smiles(smiles)
+            np.testing.assert_allclose(transformed.values, result.iloc[transformed.index, :2].values, atol=1e-6)
+
+    def test_tsne_interpolation(self):
+        """
+        3. Test checks if t-SNE places new molecules inside the reference embedding without recomputing it
+        """
+        result = self.plotter_tailored_LOGS.tsne(random_state=0)
+        with patch("sklearn.manifold.TSNE.fit_transform", side_effect=AssertionError("embedding recomputed")):
+            transformed = self.plotter_tailored_LOGS.transform_smiles(["CCO", "CCCCCCO", "c1ccccc1O"])
+        self.assertEqual(list(transformed.columns), list(result.columns[:2]))
+        self.assertTrue((transformed.min() >= result.iloc[:, :2].min()).all())
+        self.assertTrue((transformed.max() <= result.iloc[:, :2].max()).all())
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_erroneous_smiles(self, mock_stdout):
+        """
+        4. Test checks if erroneous SMILES are removed and the other molecules keep their position as index
+        """
+        self.plotter_no_target_LOGS.umap(random_state=0)
+        transformed = self.plotter_no_target_LOGS.transform_smiles(["CCO", "non_smile", "c1ccccc1O"])
+        self.assertEqual(list(transformed.index), [0, 2])
+        self.assertFalse(np.isnan(transformed.values).any())
+        self.assertIn("The following erroneous SMILES have been found in the data:\nnon_smile.", mock_stdout.getvalue())
+
+    def test_tanimoto_interpolation(self):
+        """
+        5. Test checks if new molecules are placed from the Tanimoto neighbours graph of the embedding
+        """
+        result = self.plotter_no_target_LOGS.umap(random_state=0, tanimoto=True)
+        # Molecules whose fingerprint is not shared by another plotted molecule are placed on their own coordinates
+        fingerprints = self.plotter_no_target_LOGS._Plotter__df_descriptors.values
+        _, rows, counts = np.unique(fingerprints, axis=0, return_index=True, return_counts=True)
+        rows = np.sort(rows[counts == 1])[:5]
+        transformed = self.plotter_no_target_LOGS.transform_smiles(list(self.data_LOGS["smiles"].iloc[rows]), n_neighbors=1)
+        np.testing.assert_allclose(transformed.values, result.iloc[rows, :2].values, atol=1e-6)
@@ -1,11 +1,16 @@
 import unittest
+import warnings
 from io import StringIO
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn.exceptions import EfficiencyWarning
 
-from chemplot import parameters
+from chemplot import Plotter, parameters
+from chemplot.chemplot import _layout_chunk
+from chemplot.neighbors import EuclideanNeighbors
 
 SKLEARN_COMPLEXITY_CHANGE = """
 Previous versions of scikit-learn would allow requesting perplexities greater than the number of
@@ -14,7 +19,7 @@ We skip this unit test since it relies on the old behavior.
 """
 
 
-@pytest.mark.usefixtures("logs_plotter", "logs_structural")
+@pytest.mark.usefixtures("logs_data", "logs_plotter", "logs_structural", "logs_sparse")
 class TesttSNE(unittest.TestCase):
     def test_default_structural_perplexity(self):
         """
@@ -155,6 +160,109 @@ class TesttSNE(unittest.TestCase):
         result = self.plotter_tailored_LOGS.tsne()
         self.assertEqual(list.sort(list(result["target"])), list.sort(self.plotter_tailored_LOGS._Plotter__target))
 
+    def test_sparse(self):
+        """
+        17. Test checks if sparse fingerprints are reduced before t-SNE
+        """
+        result = self.plotter_sparse_LOGS.tsne()
+        self.assertIsInstance(self.plotter_sparse_LOGS._Plotter__data, np.ndarray)
+        self.assertEqual(result.shape, (len(self.plotter_sparse_LOGS._Plotter__target), 3))
+
+    def test_embed_unique(self):
+        """
+        18. Test checks if only unique molecules are embedded and duplicates share their coordinates
+        """
+        smiles = list(self.data_LOGS["smiles"]) + list(self.data_LOGS["smiles"].head(20))
+        cp = Plotter.from_smiles(smiles, sim_type="structural", embed_unique=True)
+        result = cp.tsne(random_state=0)
+        self.assertEqual(len(result), len(smiles))
+        self.assertLessEqual(len(cp._Plotter__unique_rows), len(self.data_LOGS))
+        np.testing.assert_array_equal(result.values[:20], result.values[-20:])
+
+    def test_tanimoto(self):
+        """
+        19. Test checks if t-SNE is computed on the Tanimoto neighbours graph of the fingerprints
+        """
+        result = self.plotter_sparse_LOGS.tsne(random_state=0, tanimoto=True)
+        self.assertEqual(self.plotter_sparse_LOGS.tsne_fit.metric, "precomputed")
+        self.assertEqual(result.shape, (len(self.plotter_sparse_LOGS._Plotter__target), 3))
+        self.assertFalse(result.isna().values.any())
+
+    @patch("builtins.print")
+    def test_tanimoto_tailored(self, mock_print):
+        """
+        20. Test checks if the Tanimoto neighbours graph is not used for tailored descriptors
+        """
+        self.plotter_tailored_LOGS.tsne(random_state=0, tanimoto=True)
+        mock_print.assert_called_with("The Tanimoto neighbours graph is only available for structural fingerprints without PCA preprocessing.")
+        self.assertEqual(self.plotter_tailored_LOGS._Plotter__neighbors_graph.metric, "euclidean")
+
+    def test_shared_neighbors_graph(self):
+        """
+        21. Test checks if t-SNE and UMAP share the neighbours graph of the same data across calls
+        """
+        cp = Plotter.from_smiles(self.data_LOGS["smiles"], sim_type="structural")
+        with patch("chemplot.neighbors.EuclideanNeighbors.fit", autospec=True, side_effect=EuclideanNeighbors.fit) as mock_fit:
+            cp.tsne(random_state=0)
+            cp.umap(random_state=0)
+            cp.umap(random_state=1, min_dist=0.5)
+            cp.tsne(random_state=1)
+        mock_fit.assert_called_once()
+        self.assertEqual(cp.tsne_fit.metric, "precomputed")
+        self.assertIsNotNone(cp.umap_fit.precomputed_knn[0])
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_landmarks(self, mock_stdout):
+        """
+        22. Test checks if t-SNE embeds the landmarks only, and all the molecules when there are too many landmarks
+        """
+        result = self.plotter_tailored_LOGS.tsne(random_state=0, landmarks=10)
+        self.assertEqual(self.plotter_tailored_LOGS.tsne_fit.embedding_.shape, (10, 2))
+        self.assertEqual(result.shape, (len(self.plotter_tailored_LOGS._Plotter__target), 3))
+        self.assertFalse(result.isna().values.any())
+        self.plotter_tailored_LOGS.tsne(random_state=0, landmarks=10000)
+        self.assertIsNone(self.plotter_tailored_LOGS._Plotter__landmark_rows)
+        self.assertIn("The number of landmarks is not smaller than the number of molecules.", mock_stdout.getvalue())
+
+    @patch("builtins.print")
+    def test_sweep(self, mock_print):
+        """
+        23. Test checks if the t-SNE sweep embeds every perplexity, and only t-SNE and UMAP are swept
+        """
+        sweep = self.plotter_tailored_LOGS.sweep("tsne", perplexity=[2, 5], random_state=0)
+        self.assertEqual(sorted(set(sweep.index.get_level_values("perplexity"))), [2, 5])
+        self.assertFalse(sweep.isna().values.any())
+        self.assertIsNone(self.plotter_tailored_LOGS.sweep("pca"))
+        mock_print.assert_called_with('The method of the sweep must be "tsne" or "umap".')
+
+    def test_sorted_neighbors_graph(self):
+        """
+        24. Test checks if the neighbours graph is passed to t-SNE sorted by distance, without efficiency warnings
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", EfficiencyWarning)
+            self.plotter_tailored_LOGS.tsne(random_state=0)
+        graph = self.plotter_tailored_LOGS._Plotter__neighbors_graph.distance_matrix()
+        for row in range(graph.shape[0]):
+            distances = graph.data[graph.indptr[row] : graph.indptr[row + 1]]
+            self.assertTrue((np.diff(distances) >= 0).all())
+
+    @patch("builtins.print")
+    def test_sweep_checks(self, mock_print):
+        """
+        25. Test checks if the sweep checks the perplexity as t-SNE and fits an explicit metric on the data
+        """
+        n_samples = len(self.plotter_tailored_LOGS._Plotter__data)
+        with self.assertRaises(ValueError):
+            self.plotter_tailored_LOGS.sweep("tsne", perplexity=[5, n_samples], random_state=0)
+        with patch("chemplot.chemplot._layout_chunk", wraps=_layout_chunk) as layout_chunk:
+            sweep = self.plotter_tailored_LOGS.sweep("tsne", perplexity=[5], metric="manhattan", random_state=0)
+        ((kwargs, data),) = layout_chunk.call_args.args[0]
+        self.assertEqual(kwargs["metric"], "manhattan")
+        self.assertIsInstance(data, np.ndarray)
+        self.assertNotIn("neighbors", sweep.attrs["timings"])
+        self.assertFalse(sweep.isna().values.any())
+
 
 if __name__ == "__main__":
     unittest.main()
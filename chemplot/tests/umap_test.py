@@ -2,13 +2,15 @@ import unittest
 from io import StringIO
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
+from scipy.sparse import issparse
 
 from chemplot import parameters
 
 
-@pytest.mark.usefixtures("logs_plotter", "logs_structural")
+@pytest.mark.usefixtures("logs_plotter", "logs_structural", "logs_sparse")
 class TestUMAP(unittest.TestCase):
     def test_default_structural_n_neighbors(self):
         """
@@ -175,6 +177,60 @@ class TestUMAP(unittest.TestCase):
         result = self.plotter_tailored_LOGS.umap()
         self.assertEqual(list.sort(list(result["target"])), list.sort(self.plotter_tailored_LOGS._Plotter__target))
 
+    def test_sparse(self):
+        """
+        21. Test checks if sparse fingerprints are embedded without being densified
+        """
+        result = self.plotter_sparse_LOGS.umap(metric="jaccard")
+        self.assertTrue(issparse(self.plotter_sparse_LOGS._Plotter__data))
+        self.assertEqual(result.shape, (len(self.plotter_sparse_LOGS._Plotter__target), 3))
+
+    def test_tanimoto(self):
+        """
+        22. Test checks if UMAP is computed on the precomputed Tanimoto neighbours graph of the fingerprints
+        """
+        result = self.plotter_sparse_LOGS.umap(random_state=0, tanimoto=True)
+        self.assertIsNotNone(self.plotter_sparse_LOGS.umap_fit.precomputed_knn[0])
+        self.assertEqual(result.shape, (len(self.plotter_sparse_LOGS._Plotter__target), 3))
+        self.assertFalse(result.isna().values.any())
+
+    def test_landmarks(self):
+        """
+        23. Test checks if only the landmarks are embedded and the other molecules are placed from them
+        """
+        result = self.plotter_tailored_LOGS.umap(random_state=0, landmarks=10)
+        self.assertEqual(self.plotter_tailored_LOGS.umap_fit.embedding_.shape, (10, 2))
+        self.assertEqual(result.shape, (len(self.plotter_tailored_LOGS._Plotter__target), 3))
+        self.assertFalse(result.isna().values.any())
+        landmark_rows = self.plotter_tailored_LOGS._Plotter__landmark_rows
+        np.testing.assert_allclose(result.iloc[landmark_rows, :2].values, self.plotter_tailored_LOGS.umap_fit.embedding_, atol=1e-5)
+
+    def test_sweep(self):
+        """
+        24. Test checks if the sweep returns the embedding of every setting without replacing the embedding of the Plotter
+        """
+        result = self.plotter_tailored_LOGS.pca()
+        sweep = self.plotter_tailored_LOGS.sweep("umap", n_neighbors=[3, 5], min_dist=[0.1, 0.5], random_state=0)
+        n_molecules = len(self.plotter_tailored_LOGS._Plotter__target)
+        self.assertEqual(sweep.index.names[:2], ["n_neighbors", "min_dist"])
+        self.assertEqual(sweep.shape, (4 * n_molecules, 3))
+        self.assertEqual(list(sweep.loc[(5, 0.5)].columns), ["UMAP-1", "UMAP-2", "target"])
+        self.assertEqual(
+            set(sweep.attrs["timings"]),
+            {"neighbors", "n_neighbors=3, min_dist=0.1", "n_neighbors=3, min_dist=0.5", "n_neighbors=5, min_dist=0.1", "n_neighbors=5, min_dist=0.5"},
+        )
+        pd.testing.assert_frame_equal(self.plotter_tailored_LOGS._Plotter__df_2_components, result)
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_sweep_min_dist(self, mock_stdout):
+        """
+        25. Test checks if the sweep replaces an out of range min_dist by the default one, as UMAP
+        """
+        self.plotter_tailored_LOGS.pca()
+        sweep = self.plotter_tailored_LOGS.sweep("umap", n_neighbors=[5], min_dist=[2.0], random_state=0)
+        self.assertIn("min_dist must range from 0.0 up to 0.99. Default used.", mock_stdout.getvalue())
+        self.assertEqual(sorted(set(sweep.index.get_level_values("min_dist"))), [parameters.MIN_DIST_TAILORED])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 from io import StringIO
 from unittest.mock import patch
@@ -35,6 +37,21 @@ class TestUtils(unittest.TestCase):
             load_data("Invalid_name")
         self.assertTrue('"Invalid_name" cannot be found in the sample datasets' in str(context.exception))
 
+    def test_pool_after_umap(self):
+        """
+        4. Test checks if the interpreter exits after a pool of workers is used once UMAP started its threads
+        """
+        script = (
+            "from chemplot import Plotter, load_data\n"
+            "from chemplot.molecules import MoleculeSet\n"
+            "if __name__ == '__main__':\n"
+            "    smiles = load_data('LOGS')['smiles'].head(100)\n"
+            "    Plotter.from_smiles(smiles, sim_type='structural').umap(random_state=0)\n"
+            "    MoleculeSet.from_smiles(smiles, n_jobs=2)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, timeout=600)
+        self.assertEqual(result.returncode, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -46,7 +46,8 @@ class TestVisualizePlot(unittest.TestCase):
                 + "-scatter plot (scatter)\n"
                 + "-hexagon plot (hex)\n"
                 + "-kernel density estimation plot (kde)\n"
-                + "Please input one between scatter, hex or kde for parameter kind.\n"
+                + "-rasterized scatter plot for large sets (raster)\n"
+                + "Please input one between scatter, hex, kde or raster for parameter kind.\n"
                 + "As default scatter has been taken."
             )
             in mock_stdout.getvalue()
@@ -455,6 +456,28 @@ class TestVisualizePlot(unittest.TestCase):
         self.assertEqual(100, count)
         pyplot.close()
 
+    def test_kind_raster(self):
+        """
+        38. Test checks if the raster plot draws the molecules as a single image colored by target or clusters
+        """
+        result = self.plotter_pca_LOGS.visualize_plot(kind="raster")
+        self.assertEqual(result.get_label(), "raster")
+        self.assertEqual(len(result.images), 1)
+        self.assertEqual(len(result.collections), 0)
+        # A continuous target is represented by a colorbar
+        self.assertEqual(len(result.figure.axes), 2)
+        pyplot.close()
+        result = self.plotter_pca_BBBP.visualize_plot(kind="raster")
+        self.assertEqual(sorted(t.get_text() for t in result.get_legend().texts), ["0", "1"])
+        pyplot.close()
+        self.plotter_pca_BBBP.cluster(n_clusters=5)
+        result = self.plotter_pca_BBBP.visualize_plot(kind="raster", clusters=True)
+        self.assertEqual(len(result.get_legend().texts), 5)
+        pyplot.close()
+        result = self.plotter_pca_BBBP.visualize_plot(kind="raster", is_colored=False)
+        self.assertIsNone(result.get_legend())
+        pyplot.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+# Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
+# Multi-resolution tiles of an embedding, loaded by the interactive plots as the user zooms
+#
+# License: BSD 3 clause
+import glob
+import json
+import os
+
+import numpy as np
+
+
+def point_levels(x, y, tile_points, max_level, random_state=None):
+    """
+    Computes the level of a multi-resolution pyramid at which each point is first shown. Level l
+    splits the bounding box of the points in 2^l x 2^l tiles and shows at most tile_points points
+    per tile, picked in the same random order at every level: sparse regions are shown in full at
+    coarse levels and dense regions are subsampled, the points of a level being a subset of the
+    points of the next one. The points left at the last level are all shown by it.
+
+    :param x: First coordinate of the points
+    :param y: Second coordinate of the points
+    :param tile_points: Largest number of points shown by a tile
+    :param max_level: Last level of the pyramid
+    :param random_state: random seed of the order in which the points are picked
+    :type x: numpy.ndarray
+    :type y: numpy.ndarray
+    :type tile_points: int
+    :type max_level: int
+    :type random_state: int
+    :returns: The level of each point and the bounding box of the points (x min, x max, y min, y max)
+    :rtype: tuple
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bounds = (x.min(), x.max(), y.min(), y.max())
+    n_points = len(x)
+    priority = np.random.RandomState(random_state).permutation(n_points)
+
+    levels = np.full(n_points, max_level, dtype=np.int64)
+    for level in range(max_level):
+        i, j = tile_index(x, y, bounds, level)
+        tiles = j * 2**level + i
+        # Rank of each point in its tile by priority
+        order = np.lexsort((priority, tiles))
+        sorted_tiles = tiles[order]
+        ranks = np.empty(n_points, dtype=np.int64)
+        ranks[order] = np.arange(n_points) - np.searchsorted(sorted_tiles, sorted_tiles, side="left")
+        shown = (ranks < tile_points) & (levels > level)
+        levels[shown] = level
+        if (ranks < tile_points).all():
+            break
+    return levels, bounds
+
+
+def tile_index(x, y, bounds, level):
+    """
+    Computes the tile of each point at a level of the pyramid.
+
+    :param x: First coordinate of the points
+    :param y: Second coordinate of the points
+    :param bounds: Bounding box of the pyramid (x min, x max, y min, y max)
+    :param level: Level of the pyramid, made of 2^level x 2^level tiles
+    :type x: numpy.ndarray
+    :type y: numpy.ndarray
+    :type bounds: tuple
+    :type level: int
+    :returns: The column and the row of the tile of each point, the points on the upper edges are in the last tiles
+    :rtype: tuple
+    """
+    n_tiles = 2**level
+    width = (bounds[1] - bounds[0]) or 1.0
+    height = (bounds[3] - bounds[2]) or 1.0
+    i = np.minimum(((np.asarray(x) - bounds[0]) / width * n_tiles).astype(np.int64), n_tiles - 1)
+    j = np.minimum(((np.asarray(y) - bounds[2]) / height * n_tiles).astype(np.int64), n_tiles - 1)
+    return i, j
+
+
+def write_tiles(directory, data, x, y, levels, bounds):
+    """
+    Writes the points of each tile of the levels after the first one in a script of the directory,
+    which stores them in window.chemplotTiles["<directory name>/<level>_<column>_<row>"] when loaded
+    by the plot. Scripts are loaded from local files by browsers, unlike data files. The scripts
+    already in the directory are removed.
+
+    :param directory: Directory of the tiles scripts. It is created if missing.
+    :param data: Columns of the data source of the plot, one value per point
+    :param x: First coordinate of the points
+    :param y: Second coordinate of the points
+    :param levels: Level of the pyramid at which each point is first shown
+    :param bounds: Bounding box of the pyramid (x min, x max, y min, y max)
+    :type directory: string
+    :type data: dict
+    :type x: numpy.ndarray
+    :type y: numpy.ndarray
+    :type levels: numpy.ndarray
+    :type bounds: tuple
+    :returns: The keys (<level>_<column>_<row>) of the tiles written
+    :rtype: list
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.js")):
+        os.remove(path)
+
+    name = os.path.basename(os.path.normpath(directory))
+    keys = []
+    for level in range(1, levels.max() + 1):
+        rows = np.flatnonzero(levels == level)
+        i, j = tile_index(x[rows], y[rows], bounds, level)
+        tiles = j * 2**level + i
+        order = np.argsort(tiles, kind="stable")
+        rows, tiles = rows[order], tiles[order]
+        starts = np.flatnonzero(np.r_[True, tiles[1:] != tiles[:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(rows)]):
+            tile_rows = rows[start:stop]
+            key = f"{level}_{tiles[start] % 2**level}_{tiles[start] // 2**level}"
+            columns = {column: _json_values(values[tile_rows]) for column, values in data.items()}
+            with open(os.path.join(directory, key + ".js"), "w") as script:
+                script.write("window.chemplotTiles = window.chemplotTiles || {};\n")
+                script.write(f"window.chemplotTiles[{json.dumps(name + '/' + key)}] = {json.dumps(columns)};\n")
+            keys.append(key)
+    return keys
+
+
+def _json_values(values):
+    # Values of a column as JSON serializable numbers or strings, float32 columns (the coordinates) are rounded to their precision
+    if values.dtype == np.float32:
+        return [float(value) for value in np.char.mod("%.7g", values)]
+    return values.tolist()
@@ -1,8 +1,13 @@
 # Authors: Murat Cihan Sorkun <mcsorkun@gmail.com>, Dajt Mullaj <dajt.mullai@gmail.com>, Jackson Warner Burns <jwburns@mit.edu>
 #
 # License: BSD 3 clause
+import functools
+import math
+import multiprocessing
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from importlib.resources import files
 
 import pandas as pd
@@ -43,3 +48,76 @@ def info_data():
     """
 
     print(INFO_DATASET)
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Returns the number of worker processes corresponding to n_jobs.
+
+    :param n_jobs: Number of jobs. None means 1, negative values count back from the number of CPUs (-1 uses all of them).
+    :type n_jobs: int
+    :returns: The number of worker processes to use
+    :rtype: int
+    """
+
+    if n_jobs is None:
+        return 1
+    if n_jobs == 0:
+        raise ValueError("n_jobs == 0 has no meaning")
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def map_chunks(function, items, n_jobs=1, chunk_size=None, args=(), concatenate=True):
+    """
+    Applies a function to consecutive chunks of a list, using a pool of
+    processes when more than one job is requested. The workers are not forked
+    from the current process, which may already run threads (e.g. the numba
+    threads of UMAP) that a forked child would wait for at exit. As with any
+    such pool, scripts using it must guard their main code with
+    if __name__ == "__main__".
+
+    :param function: Module level function taking a chunk (list) followed by args and returning a list
+    :param items: Items to split in chunks
+    :param n_jobs: Number of worker processes
+    :param chunk_size: Number of items sent to a worker at once. By default each worker receives about four chunks.
+    :param args: Extra positional arguments passed to function
+    :param concatenate: If False the results of the chunks are returned one by one instead of being concatenated
+    :type function: fun
+    :type items: list
+    :type n_jobs: int
+    :type chunk_size: int
+    :type args: tuple
+    :type concatenate: boolean
+    :returns: The concatenation of the results of every chunk (or the list of the results of every chunk), in input order
+    :rtype: list
+    """
+
+    items = list(items)
+    n_jobs = effective_n_jobs(n_jobs)
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(items) / (n_jobs * 4)))
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    function = functools.partial(_apply_to_chunk, function, tuple(args))
+
+    if n_jobs == 1 or len(chunks) < 2:
+        results = list(map(function, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), mp_context=_pool_context()) as executor:
+            results = list(executor.map(function, chunks))
+
+    if not concatenate:
+        return results
+    return [result for chunk_results in results for result in chunk_results]
+
+
+def _pool_context():
+    # Workers are started by a fork server where available, by spawning new interpreters otherwise (Windows)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _apply_to_chunk(function, args, chunk):
+    return function(chunk, *args)
@@ -0,0 +1,21 @@
+"""
+Performance Test for the ChemPlot fingerprints calculation.
+
+Output is the time spent in each stage (parse, AddHs, fingerprint, filter) of
+the fingerprints calculation for the HIV data set.
+"""
+
+import time
+
+from chemplot import descriptors, load_data
+
+if __name__ == "__main__":
+    data_HIV_3 = load_data("C_41127_HIV_3.csv")
+
+    t0 = time.time()
+    mols, df_ecfp, target = descriptors.get_ecfp(data_HIV_3["smiles"], data_HIV_3["target"])
+    t1 = time.time()
+
+    print("CHEMPLOT - FingerprintTest - Fingerprints of HIV (41127) computed in %.2f s" % (t1 - t0))
+    for stage, seconds in df_ecfp.attrs["timings"].items():
+        print("CHEMPLOT - FingerprintTest - %s: %.2f s" % (stage, seconds))